@@ -8,11 +8,10 @@ from sqlalchemy import text
 from auth.signup import signup
 from auth.login import login
 from database.db import get_engine
+from session_store import enter_session, release_session
 
-# 🤖 Assistant
-from assistant import Assistant
-from prompt import SYSTEM_PROMPT, WELCOME_MESSAGE
-from langchain_groq import ChatGroq
+# 🤖 Assistant, LLM, RAG and voice modules are imported lazily after login so the
+# login page does not pay for them (see benchmarks/import_time.py).
 
 load_dotenv()
 logging.basicConfig(level=logging.INFO)
@@ -21,6 +20,13 @@ st.set_page_config(page_title="Umbrella Onboarding Assistant",
                    layout="wide", page_icon="☂")
 
 
+@st.cache_resource(show_spinner=False)
+def get_policy_index():
+    # Shared across sessions; picks up newly ingested generations without a restart
+    from rag.index import get_policy_index
+    return get_policy_index()
+
+
 def main():
     st.sidebar.title("☂️ Umbrella Corporation Assistant")
 
@@ -33,6 +39,9 @@ def main():
         if k not in st.session_state:
             st.session_state[k] = v
 
+    # Rehydrate if this session was evicted while idle; evict other idle sessions
+    enter_session()
+
     # Auth
     if not st.session_state["user"]:
         auth_mode = st.sidebar.radio("Select Mode", ["Login", "Sign Up"])
@@ -47,6 +56,8 @@ def main():
 
     employee = st.session_state["employee"]
 
+    from prompt import SYSTEM_PROMPT, WELCOME_MESSAGE
+
     # Sidebar profile
     st.sidebar.markdown("---")
     st.sidebar.success(
@@ -56,6 +67,10 @@ def main():
         f"**Supervisor:** {employee['supervisor']}"
     )
     if st.sidebar.button("🚪 Logout"):
+        # Make sure this conversation is in Postgres before the next login reloads history
+        from database.chat_writer import flush_pending
+        flush_pending()
+        release_session()
         st.session_state.clear()
         st.rerun()
 
@@ -70,13 +85,26 @@ def main():
 
     # Assistant once per session
     if not st.session_state["assistant"]:
+        from assistant import Assistant
+        from langchain_groq import ChatGroq
+        from rag.rerank import RERANKER_FETCH_K, get_reranker
+        from rag.warmup import PrecomputedAnswers
+        from tools import ASSISTANT_TOOLS
+
         # llama-3.1-8b-instant or llama-3.3-70b-versatile
         llm = ChatGroq(model="llama-3.3-70b-versatile")
+        index = get_policy_index()
         # llm = ChatOpenAI(model="gpt-4o-mini")
         st.session_state["assistant"] = Assistant(
             system_prompt=SYSTEM_PROMPT,
             llm=llm,
+            index=index,
+            reranker=get_reranker(),
+            fetch_k=RERANKER_FETCH_K,
             employee_information=employee,
+            # Follows the index version, so a swap also switches to that version's answers
+            answer_cache=PrecomputedAnswers.for_employee(employee, lambda: index.version),
+            tools=ASSISTANT_TOOLS,
         )
 
     # Lazy import to avoid circulars
@@ -1,3 +1,41 @@
+import threading
+
+
+class Generation():
+    # Handle for one streamed answer. Iterate it for tokens; cancel() stops it and closes the
+    # upstream stream, which aborts the LLM request instead of letting it run to completion.
+    def __init__(self, stream):
+        self._stream = stream
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def __iter__(self):
+        try:
+            for token in self._stream:
+                if self._cancelled.is_set():
+                    break
+                yield token
+        finally:
+            self._close()
+
+    def cancel(self):
+        self._cancelled.set()
+        self._close()
+
+    def _close(self):
+        close = getattr(self._stream, "close", None)
+        if close is None:
+            return
+        try:
+            close()
+        except ValueError:
+            # Being iterated on another thread right now; it stops at the next token
+            pass
+
+
 class Assistant():
     # brain of the chatbot
     def __init__(
@@ -6,30 +44,142 @@ class Assistant():
         llm,
         message_history=None,
         vector_store=None,
-        employee_information=None
+        employee_information=None,
+        top_k=4,
+        answer_cache=None,
+        tools=None,
+        max_tool_rounds=2,
+        index=None,
+        reranker=None,
+        fetch_k=20,
     ):
         self.system_prompt = system_prompt
         self.llm = llm
         self.message_history = message_history or []
         self.vector_store = vector_store
+        # Hot-swappable policy index (rag/index.py); takes precedence over a fixed vector_store
+        self.index = index
         self.employee_information = employee_information
+        self.top_k = top_k
+        # Optional second stage (rag/rerank.py): fetch_k candidates are reranked down to top_k
+        self.reranker = reranker
+        self.fetch_k = max(fetch_k, top_k)
+        # Precomputed answers for common questions (see rag/warmup.py); anything with `get(question)`
+        self.answer_cache = answer_cache
+        # LangChain tools the model may call (e.g. the employee directory, see tools.py)
+        self.tools = tools or []
+        self.max_tool_rounds = max_tool_rounds
+        # The answer currently being streamed; a new question supersedes (cancels) it
+        self.active_generation = None
 
         self.chain = self._get_conversation_chain()
 
-    def get_response(self, user_input):
-        return self.chain.stream({"user_input": user_input})
+    def get_response(self, user_input, retrieved_policy_information=None, first_turn=False):
+        # first_turn: the caller's transcript has no earlier messages, so a precomputed,
+        # role-generic answer cannot contradict the conversation so far
+        self.cancel()
+        self.active_generation = Generation(
+            self._stream(user_input, retrieved_policy_information, first_turn)
+        )
+        return self.active_generation
+
+    def cancel(self):
+        generation, self.active_generation = self.active_generation, None
+        if generation is not None:
+            generation.cancel()
+
+    def _stream(self, user_input, retrieved_policy_information=None, first_turn=False):
+        if first_turn and self.answer_cache is not None and not self.message_history:
+            cached = self.answer_cache.get(user_input)
+            if cached:
+                return iter([cached])
+
+        inputs = {"user_input": user_input}
+        if retrieved_policy_information is not None:
+            # Context already retrieved by the caller; skip the retrieval step
+            inputs["retrieved_policy_information"] = retrieved_policy_information
+        if self.tools:
+            return self._stream_with_tools(inputs)
+        return self.chain.stream(inputs)
+
+    def _stream_with_tools(self, inputs):
+        # Streams text like the plain chain; only when the model asks for a tool is the
+        # tool run and the model called again with its result.
+        from langchain_core.messages import ToolMessage
+
+        messages = self.prompt_chain.invoke(inputs).to_messages()
+        tools_by_name = {t.name: t for t in self.tools}
+        llm_with_tools = self.llm.bind_tools(self.tools)
+
+        for round_ in range(self.max_tool_rounds + 1):
+            # Last round: no tools, so the model has to answer with what it has
+            llm = llm_with_tools if round_ < self.max_tool_rounds else self.llm
+            gathered = None
+            for chunk in llm.stream(messages):
+                if isinstance(chunk.content, str) and chunk.content:
+                    yield chunk.content
+                gathered = chunk if gathered is None else gathered + chunk
+
+            if gathered is None or not getattr(gathered, "tool_calls", None):
+                return
+
+            messages.append(gathered)
+            for call in gathered.tool_calls:
+                tool = tools_by_name.get(call["name"])
+                try:
+                    result = tool.invoke(call["args"]) if tool else f"Unknown tool: {call['name']}"
+                except Exception as e:
+                    result = f"Tool error: {e}"
+                messages.append(ToolMessage(content=str(result), tool_call_id=call["id"]))
+
+    def _retrieve(self, query):
+        # Pre-filter the index on the employee's department, region and clearance
+        # so only chunks they may see compete for the top-k slots.
+        if self.index is not None:
+            # Pinned for the whole search, so a swap mid-query cannot close it underneath us
+            with self.index.lease() as generation:
+                return self._search(generation.store if generation else None, query)
+        return self._search(self.vector_store, query)
+
+    def _search(self, vector_store, query):
+        if not vector_store:
+            return None
+
+        from rag.metadata import build_filter
+
+        k = self.fetch_k if self.reranker is not None else self.top_k
+        docs = vector_store.similarity_search(
+            query, k=k, filter=build_filter(self.employee_information)
+        )
+        if self.reranker is not None:
+            docs = self.reranker.rerank(query, docs, self.top_k)
+        return self._format_documents(docs)
+
+    @staticmethod
+    def _format_documents(docs):
+        return "\n\n".join(
+            f"[{doc.metadata.get('section', 'Policy')}]\n{doc.page_content}"
+            for doc in docs
+        )
 
     def _get_conversation_chain(self):
 
         from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
         from langchain_core.output_parsers import StrOutputParser
-        from langchain_core.runnables import RunnablePassthrough
+        from prompt import CONTEXT_PROMPT, EMPLOYEE_PROMPT, format_employee_information
+
+        # Serialised once: it never changes for the lifetime of this Assistant
+        employee_information = format_employee_information(self.employee_information)
 
         prompt = ChatPromptTemplate(
-            # Defines the message structure given to the LLM
+            # Defines the message structure given to the LLM.
+            # Ordered from most to least stable so the longest possible prefix is cacheable:
+            # static instructions -> this employee -> history (append-only) -> this turn.
             [
                 ("system", self.system_prompt),
+                ("system", EMPLOYEE_PROMPT),
                 MessagesPlaceholder("conversation_history"),
+                ("system", CONTEXT_PROMPT),
                 ("human", "{user_input}")
             ]
         )
@@ -44,24 +194,23 @@ class Assistant():
         # Think of it as a dataflow pipeline, where each step processes and passes data to the next:
         # User Input ───▶ Context Dictionary ───▶ Prompt ───▶ LLM ───▶ Output Parser ───▶ Final Response
 
-        chain = (
+        self.prompt_chain = (
             {
-                # Uses your vector DB retriever to fetch policy chunks based on the question.
-                "retrieved_policy_information": (
-                    lambda x: self.vector_store.as_retriever().invoke(
-                        x["user_input"] if isinstance(x, dict) else x
-                    )
-                    if self.vector_store else None
+                # Fetches policy chunks for the question, filtered by the employee's profile.
+                "retrieved_policy_information": lambda x: (
+                    x["retrieved_policy_information"]
+                    if isinstance(x, dict) and "retrieved_policy_information" in x
+                    else self._retrieve(x["user_input"] if isinstance(x, dict) else x)
                 ),
-                # A small function that injects employee info (so the model can personalize answers).
-                "employee_information": lambda x: self.employee_information,
+                # Injects the compact employee profile (so the model can personalize answers).
+                "employee_information": lambda x: employee_information,
                 # Passes the raw user input directly into the prompt.
-                "user_input": RunnablePassthrough(),
+                "user_input": lambda x: x["user_input"] if isinstance(x, dict) else x,
                 # Injects the ongoing chat history.
                 "conversation_history": lambda x: self.message_history,
-            }  # Each of these entries fills a {placeholder} in your SYSTEM_PROMPT or prompt template.
+            }  # Each of these entries fills a {placeholder} in the prompt templates.
             | prompt
-            | llm
-            | output_parser
         )
+
+        chain = self.prompt_chain | llm | output_parser
         return chain
@@ -6,11 +6,14 @@ import bcrypt
 from sqlalchemy import text
 from database.db import get_engine
 
+# Cost factor for new hashes (2^rounds iterations); tune with benchmarks/login_storm.py
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
 
 def hash_password(password: str) -> str:
     # bcrypt supports max 72 bytes — truncate to be safe
     password_bytes = password.encode("utf-8")[:72]
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     return bcrypt.hashpw(password_bytes, salt).decode("utf-8")
 
 
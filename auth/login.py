@@ -2,8 +2,7 @@
 
 import streamlit as st
 from auth.auth_utils import get_user_by_email, verify_password
-from sqlalchemy import text
-from database.db import get_engine
+from database.db import get_employee_by_id
 
 
 def login():
@@ -21,14 +20,7 @@ def login():
             st.success("✅ Login successful.")
             st.session_state["user"] = user
             # Fetch employee info
-            engine = get_engine()
-            with engine.connect() as conn:
-                emp = conn.execute(text("SELECT * FROM employees WHERE employee_id = :eid"), {
-                                   "eid": user["employee_id"]}).fetchone()
-                if emp is not None:
-                    st.session_state["employee"] = dict(emp._mapping)
-                else:
-                    st.session_state["employee"] = None
+            st.session_state["employee"] = get_employee_by_id(user["employee_id"])
             return user
         else:
             st.error("Invalid password.")
@@ -1,8 +1,7 @@
 # Handles first-time registration (based on existing employee record).
 
 import streamlit as st
-from sqlalchemy import text
-from database.db import get_engine
+from database.db import get_employee_by_email
 from auth.auth_utils import create_user, get_user_by_email
 
 
@@ -17,10 +16,7 @@ def signup():
             st.error("Passwords do not match.")
             return
 
-        engine = get_engine()
-        with engine.connect() as conn:
-            employee = conn.execute(text("SELECT employee_id FROM employees WHERE email = :email"), {
-                                    "email": email}).fetchone()
+        employee = get_employee_by_email(email)
 
         if not employee:
             st.error("No employee record found for this email. Contact HR.")
@@ -30,5 +26,5 @@ def signup():
             st.warning("User already exists. Please log in instead.")
             return
 
-        create_user(email, password, employee.employee_id)
+        create_user(email, password, employee["employee_id"])
         st.success("✅ Registration successful! You can now log in.")
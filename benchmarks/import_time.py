@@ -0,0 +1,94 @@
+# Import-time profile of the login page (`python -X importtime`), checked against a budget.
+#
+# Usage:
+#   python -m benchmarks.import_time                  # report + check
+#   python -m benchmarks.import_time --budget-ms 800 --top 20
+#
+# Exits non-zero when the cold import of `app` exceeds the budget or pulls in any of the
+# heavy subsystems that should only load after login.
+
+from __future__ import annotations
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "1500"))
+
+# Top-level packages the login page must not import
+DEFERRED_MODULES = (
+    "assistant", "gui", "rag", "voice",
+    "langchain_groq", "langchain_core", "langchain_chroma", "chromadb",
+    "groq", "gtts", "pyttsx3", "numpy",
+)
+
+LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def profile(target: str = "app") -> List[Tuple[str, int, int, int]]:
+    """Return (module, self_us, cumulative_us, depth) for every import, in import order."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"`import {target}` failed:\n{proc.stderr[-2000:]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = LINE_RE.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    return rows
+
+
+def summarize(rows: List[Tuple[str, int, int, int]]) -> Dict[str, int]:
+    # Cumulative time per top-level package, from the outermost import of each
+    per_package: Dict[str, int] = {}
+    for module, _, cumulative, depth in rows:
+        if depth == 0:
+            package = module.split(".")[0]
+            per_package[package] = per_package.get(package, 0) + cumulative
+    return per_package
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Import-time profile of the login page.")
+    parser.add_argument("--target", default="app")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    rows = profile(args.target)
+    total_ms = sum(self_us for _, self_us, _, _ in rows) / 1000
+    per_package = summarize(rows)
+
+    print(f"📦 import {args.target}: {total_ms:.1f} ms total, {len(rows)} modules")
+    print(f"{'package':<30}{'cumulative ms':>15}")
+    for package, cumulative in sorted(per_package.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"{package:<30}{cumulative / 1000:>15.1f}")
+
+    loaded = {module.split(".")[0] for module, _, _, _ in rows}
+    leaked = sorted(loaded.intersection(DEFERRED_MODULES))
+
+    ok = True
+    if leaked:
+        ok = False
+        print(f"❌ Deferred modules imported at startup: {', '.join(leaked)}")
+    if total_ms > args.budget_ms:
+        ok = False
+        print(f"❌ Import time {total_ms:.1f} ms exceeds budget of {args.budget_ms:.0f} ms")
+    if ok:
+        print(f"✅ Within budget ({args.budget_ms:.0f} ms), no deferred modules loaded")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+# Login-storm load generator: many new hires signing up and logging in at once.
+#
+# Drives the same functions the Streamlit signup/login pages use (database.db + auth.auth_utils),
+# without the UI, against the Postgres in DATABASE_URL. Use a local / disposable database.
+#
+# Usage:
+#   python -m benchmarks.login_storm --users 300 --concurrency 50
+#   python -m benchmarks.login_storm --users 300 --concurrency 50 --pool-size 20 --max-overflow 0 --rounds 10
+#
+# Reports throughput, latency percentiles per step, connection-pool wait times and the share of
+# CPU spent in bcrypt, then deletes the seeded rows (unless --keep).
+
+from __future__ import annotations
+import argparse
+import json
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+
+import auth.auth_utils as auth_utils
+from data.employees import generate_employee_data
+from database import db
+
+PASSWORD = "Umbrella-Storm-123!"
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    waits: List[float] = []
+    _waits_lock = threading.Lock()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            with self._waits_lock:
+                TimedQueuePool.waits.append(time.perf_counter() - start)
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.bcrypt_cpu = 0.0
+
+    def timed(self, step: str, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        except Exception:
+            with self._lock:
+                self.errors[step] += 1
+            raise
+        finally:
+            with self._lock:
+                self.latencies[step].append(time.perf_counter() - start)
+
+    def cpu_timed(self, fn):
+        # Wrap a bcrypt-bound function and accumulate the CPU time of the calling thread
+        def wrapper(*args, **kwargs):
+            start = time.thread_time()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.thread_time() - start
+                with self._lock:
+                    self.bcrypt_cpu += elapsed
+        return wrapper
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def seed(run_id: str, n: int) -> List[str]:
+    employees = generate_employee_data(n)
+    for i, e in enumerate(employees):
+        e["employee_id"] = str(uuid.uuid4())
+        e["email"] = f"storm-{run_id}-{i}@umbrella.test"
+        e["skills"] = json.dumps(e["skills"])
+    db.insert_employees(employees)
+    return [e["email"] for e in employees]
+
+
+def cleanup(run_id: str) -> None:
+    pattern = f"storm-{run_id}-%@umbrella.test"
+    with db.conn() as c:
+        c.execute(text("DELETE FROM users WHERE email LIKE :p"), {"p": pattern})
+        c.execute(text("DELETE FROM employees WHERE email LIKE :p"), {"p": pattern})
+
+
+def new_hire(rec: Recorder, email: str) -> None:
+    # Signup page: employee lookup, duplicate check, hash + insert
+    employee = rec.timed("signup.employee_lookup", db.get_employee_by_email, email)
+    if not employee:
+        raise RuntimeError(f"seeded employee missing: {email}")
+    rec.timed("signup.user_lookup", auth_utils.get_user_by_email, email)
+    rec.timed("signup.create_user", auth_utils.create_user, email, PASSWORD, employee["employee_id"])
+
+    # Login page: user lookup, password check, employee profile
+    user = rec.timed("login.user_lookup", auth_utils.get_user_by_email, email)
+    if not rec.timed("login.verify_password", auth_utils.verify_password, PASSWORD, user["password_hash"]):
+        raise RuntimeError("password verification failed")
+    rec.timed("login.employee_lookup", db.get_employee_by_id, user["employee_id"])
+
+
+def run_flow(rec: Recorder, email: str) -> None:
+    start = time.perf_counter()
+    try:
+        new_hire(rec, email)
+    except Exception:
+        with rec._lock:
+            rec.errors["flow"] += 1
+    finally:
+        with rec._lock:
+            rec.latencies["flow"].append(time.perf_counter() - start)
+
+
+def report(rec: Recorder, wall: float, cpu: float, users: int) -> None:
+    ms = 1000
+    print(f"\n🧪 {users} signup+login flows in {wall:.2f}s → {users / wall:.1f} flows/s")
+    print(f"{'step':<26}{'n':>6}{'err':>6}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for step, values in sorted(rec.latencies.items()):
+        print(
+            f"{step:<26}{len(values):>6}{rec.errors.get(step, 0):>6}"
+            f"{percentile(values, 50) * ms:>10.1f}{percentile(values, 90) * ms:>10.1f}"
+            f"{percentile(values, 99) * ms:>10.1f}{max(values) * ms:>10.1f}"
+        )
+
+    waits = TimedQueuePool.waits
+    print(
+        f"\n🔌 pool checkouts: {len(waits)}  wait p50 {percentile(waits, 50) * ms:.2f} ms"
+        f"  p99 {percentile(waits, 99) * ms:.2f} ms  max {max(waits, default=0) * ms:.2f} ms"
+        f"  total {sum(waits):.2f}s"
+    )
+    share = rec.bcrypt_cpu / cpu if cpu else 0.0
+    print(f"🔐 bcrypt CPU: {rec.bcrypt_cpu:.2f}s of {cpu:.2f}s process CPU ({share:.0%})")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Concurrent signup/login load test against Postgres.")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--pool-size", type=int, default=None, help="defaults to DB_POOL_SIZE")
+    parser.add_argument("--max-overflow", type=int, default=None, help="defaults to DB_MAX_OVERFLOW")
+    parser.add_argument("--pool-timeout", type=float, default=None, help="defaults to DB_POOL_TIMEOUT")
+    parser.add_argument("--rounds", type=int, default=None, help="bcrypt cost; defaults to BCRYPT_ROUNDS")
+    parser.add_argument("--keep", action="store_true", help="keep seeded employees/users")
+    args = parser.parse_args(argv)
+
+    overrides = {"poolclass": TimedQueuePool}
+    for key in ("pool_size", "max_overflow", "pool_timeout"):
+        if getattr(args, key) is not None:
+            overrides[key] = getattr(args, key)
+    engine = db.make_engine(**overrides)
+    db.set_engine(engine)
+    if args.rounds is not None:
+        auth_utils.BCRYPT_ROUNDS = args.rounds
+
+    rec = Recorder()
+    auth_utils.hash_password = rec.cpu_timed(auth_utils.hash_password)
+    auth_utils.verify_password = rec.cpu_timed(auth_utils.verify_password)
+
+    run_id = uuid.uuid4().hex[:8]
+    print(
+        f"⚙️ run {run_id}: users={args.users} concurrency={args.concurrency} "
+        f"pool_size={engine.pool.size()} max_overflow={engine.pool._max_overflow} "
+        f"bcrypt_rounds={auth_utils.BCRYPT_ROUNDS}"
+    )
+    emails = seed(run_id, args.users)
+    TimedQueuePool.waits.clear()
+
+    try:
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(lambda email: run_flow(rec, email), emails))
+        wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+        report(rec, wall, cpu, args.users)
+    finally:
+        if not args.keep:
+            cleanup(run_id)
+
+    return 1 if rec.errors.get("flow") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
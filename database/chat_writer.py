@@ -0,0 +1,154 @@
+# Write-behind persistence of chat messages: the chat turn only enqueues, a background
+# thread batches the inserts into Postgres.
+
+from __future__ import annotations
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from database.db import insert_chat_messages
+
+logger = logging.getLogger(__name__)
+
+CHAT_FLUSH_BATCH = int(os.getenv("CHAT_FLUSH_BATCH", "50"))
+CHAT_FLUSH_INTERVAL = float(os.getenv("CHAT_FLUSH_INTERVAL", "2.0"))
+CHAT_MAX_BACKLOG = int(os.getenv("CHAT_MAX_BACKLOG", "10000"))
+
+
+class ChatWriter:
+    """
+    Bounded write-behind queue.
+
+    - `enqueue` never blocks; when the backlog is full the message is dropped and counted.
+    - The worker flushes when `batch_size` messages are waiting or every `flush_interval` seconds.
+    - Failed batches are retried on the next flush, still within the backlog bound.
+    - `close` drains and flushes everything (registered with atexit).
+    """
+
+    def __init__(
+        self,
+        write: Callable[[List[Dict[str, Any]]], None] = insert_chat_messages,
+        batch_size: int = CHAT_FLUSH_BATCH,
+        flush_interval: float = CHAT_FLUSH_INTERVAL,
+        max_backlog: int = CHAT_MAX_BACKLOG,
+    ):
+        self._write = write
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_backlog = max_backlog
+
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_backlog)
+        self._pending: List[Dict[str, Any]] = []
+        self._flush_lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        self._flushed = threading.Condition()
+        self._stop = threading.Event()
+        self.dropped = 0
+        self.failed_flushes = 0
+
+        self._thread = threading.Thread(target=self._run, name="chat-writer", daemon=True)
+        self._thread.start()
+
+    def enqueue(
+        self,
+        conversation_id: str,
+        employee_id: str,
+        role: str,
+        content: str,
+        origin: Optional[str] = None,
+    ) -> bool:
+        row = {
+            "conversation_id": str(conversation_id),
+            "employee_id": str(employee_id),
+            "role": role,
+            "content": content,
+            "origin": origin,
+            "created_at": datetime.now(timezone.utc),
+        }
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("Chat backlog full (%d); dropped a message", self.max_backlog)
+            return False
+        if self._queue.qsize() >= self.batch_size:
+            self._flush_requested.set()
+        return True
+
+    def flush(self, timeout: Optional[float] = 5.0) -> None:
+        """Ask the worker to flush now and wait until the queue has been written."""
+        self._flush_requested.set()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._flushed:
+            failed_before = self.failed_flushes
+            # A failed write (e.g. Postgres down) ends the wait; the rows stay queued for retry
+            while (self._queue.qsize() or self._pending) and self.failed_flushes == failed_before:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._flushed.wait(remaining)
+
+    def close(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        self._flush_requested.set()
+        self._thread.join(timeout)
+
+    def _drain(self) -> None:
+        while len(self._pending) < self.max_backlog:
+            try:
+                self._pending.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+    def _flush_once(self) -> None:
+        try:
+            with self._flush_lock:
+                self._drain()
+                while self._pending:
+                    batch = self._pending[:self.batch_size]
+                    try:
+                        self._write(batch)
+                    except Exception:
+                        logger.exception("Failed to persist %d chat messages; will retry", len(batch))
+                        with self._flushed:
+                            self.failed_flushes += 1
+                        return
+                    del self._pending[:len(batch)]
+                    self._drain()
+        finally:
+            # Also on failure, so flush() callers stop waiting instead of hitting their timeout
+            with self._flushed:
+                self._flushed.notify_all()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._flush_requested.wait(self.flush_interval)
+            self._flush_requested.clear()
+            self._flush_once()
+        # Shutdown: write whatever is left
+        self._flush_once()
+
+
+_writer: Optional[ChatWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_chat_writer() -> ChatWriter:
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = ChatWriter()
+                atexit.register(_writer.close)
+    return _writer
+
+
+def flush_pending(timeout: float = 5.0) -> None:
+    """Flush queued messages if the writer is running (e.g. on logout, before reloading history)."""
+    if _writer is not None:
+        _writer.flush(timeout)
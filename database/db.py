@@ -7,18 +7,35 @@ from sqlalchemy.engine import Engine
 from contextlib import contextmanager
 from dotenv import load_dotenv
 
-load_dotenv()
-
 _engine: Optional[Engine] = None
 
 
+def make_engine(**overrides: Any) -> Engine:
+    # Pool sizing is tunable per deployment (see benchmarks/login_storm.py)
+    load_dotenv()
+    options: Dict[str, Any] = {
+        "pool_pre_ping": True,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    }
+    options.update(overrides)
+    return create_engine(os.environ["DATABASE_URL"], **options)
+
+
 def get_engine() -> Engine:
     global _engine
     if _engine is None:
-        _engine = create_engine(os.environ["DATABASE_URL"], pool_pre_ping=True)
+        _engine = make_engine()
     return _engine
 
 
+def set_engine(engine: Engine) -> None:
+    """Replace the process-wide engine (load tests, scripts with custom pool settings)."""
+    global _engine
+    _engine = engine
+
+
 @contextmanager
 def conn():
     e = get_engine()
@@ -46,3 +63,170 @@ def get_employee_by_email(email: str) -> Optional[Dict[str, Any]]:
         r = c.execute(text("SELECT * FROM employees WHERE email=:e"),
                       {"e": email}).mappings().first()
         return dict(r) if r else None
+
+
+def get_employee_by_id(employee_id: str) -> Optional[Dict[str, Any]]:
+    with conn() as c:
+        r = c.execute(text("SELECT * FROM employees WHERE employee_id=:eid"),
+                      {"eid": employee_id}).mappings().first()
+        return dict(r) if r else None
+
+
+# ----------------------------------------------------------
+# Chat transcripts (conversations / messages)
+# ----------------------------------------------------------
+
+CHAT_SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS conversations (
+        id UUID PRIMARY KEY,
+        employee_id UUID NOT NULL,
+        started_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
+    CREATE TABLE IF NOT EXISTS messages (
+        id BIGSERIAL PRIMARY KEY,
+        conversation_id UUID NOT NULL REFERENCES conversations(id) ON DELETE CASCADE,
+        employee_id UUID NOT NULL,
+        role VARCHAR(16) NOT NULL,
+        content TEXT NOT NULL,
+        origin VARCHAR(16),
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
+    CREATE INDEX IF NOT EXISTS idx_messages_employee_id_id ON messages (employee_id, id DESC);
+    CREATE INDEX IF NOT EXISTS idx_messages_conversation_id ON messages (conversation_id);
+"""
+
+_chat_schema_ready = False
+
+
+def ensure_chat_schema() -> None:
+    global _chat_schema_ready
+    if _chat_schema_ready:
+        return
+    with conn() as c:
+        for statement in CHAT_SCHEMA_SQL.split(";"):
+            if statement.strip():
+                c.execute(text(statement))
+    _chat_schema_ready = True
+
+
+def insert_chat_messages(rows: List[Dict[str, Any]]) -> None:
+    """Insert a batch of messages, creating their conversations on first sight."""
+    if not rows:
+        return
+    ensure_chat_schema()
+
+    conversations = {
+        r["conversation_id"]: {
+            "id": r["conversation_id"],
+            "employee_id": r["employee_id"],
+            "started_at": r["created_at"],
+        }
+        for r in rows
+    }
+    with conn() as c:
+        c.execute(text("""
+            INSERT INTO conversations (id, employee_id, started_at)
+            VALUES (:id, :employee_id, :started_at)
+            ON CONFLICT (id) DO NOTHING
+        """), list(conversations.values()))
+        c.execute(text("""
+            INSERT INTO messages (conversation_id, employee_id, role, content, origin, created_at)
+            VALUES (:conversation_id, :employee_id, :role, :content, :origin, :created_at)
+        """), rows)
+
+
+def get_chat_history(
+    employee_id: str, before_id: Optional[int] = None, limit: int = 20
+) -> List[Dict[str, Any]]:
+    """One page of an employee's messages across conversations, oldest first.
+
+    Pass the smallest `id` of the previous page as `before_id` to fetch the page before it.
+    """
+    ensure_chat_schema()
+    with conn() as c:
+        rows = c.execute(text("""
+            SELECT id, conversation_id, role, content, origin, created_at
+            FROM messages
+            WHERE employee_id = :employee_id
+              AND (CAST(:before_id AS BIGINT) IS NULL OR id < :before_id)
+            ORDER BY id DESC
+            LIMIT :limit
+        """), {"employee_id": employee_id, "before_id": before_id, "limit": limit}).mappings().all()
+    return [dict(r) for r in reversed(rows)]
+
+
+# ----------------------------------------------------------
+# Precomputed answers (see rag/warmup.py)
+# ----------------------------------------------------------
+
+PRECOMPUTED_SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS precomputed_answers (
+        index_version VARCHAR(64) NOT NULL,
+        department VARCHAR(100) NOT NULL,
+        position VARCHAR(100) NOT NULL,
+        question_key VARCHAR(64) NOT NULL,
+        question TEXT NOT NULL,
+        answer TEXT NOT NULL,
+        contexts TEXT,
+        input_hash VARCHAR(64) NOT NULL,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        PRIMARY KEY (index_version, department, position, question_key)
+    )
+"""
+
+
+def ensure_precomputed_schema() -> None:
+    with conn() as c:
+        c.execute(text(PRECOMPUTED_SCHEMA_SQL))
+
+
+def get_department_positions() -> List[Dict[str, Any]]:
+    with conn() as c:
+        rows = c.execute(text("""
+            SELECT DISTINCT department, position
+            FROM employees
+            WHERE department IS NOT NULL AND position IS NOT NULL
+            ORDER BY department, position
+        """)).mappings().all()
+    return [dict(r) for r in rows]
+
+
+def get_precomputed_input_hashes(index_version: str) -> Dict[tuple, str]:
+    with conn() as c:
+        rows = c.execute(text("""
+            SELECT department, position, question_key, input_hash
+            FROM precomputed_answers
+            WHERE index_version = :v
+        """), {"v": index_version}).fetchall()
+    return {(r.department, r.position, r.question_key): r.input_hash for r in rows}
+
+
+def upsert_precomputed_answers(rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        return
+    with conn() as c:
+        c.execute(text("""
+            INSERT INTO precomputed_answers (
+                index_version, department, position, question_key,
+                question, answer, contexts, input_hash
+            ) VALUES (
+                :index_version, :department, :position, :question_key,
+                :question, :answer, :contexts, :input_hash
+            )
+            ON CONFLICT (index_version, department, position, question_key) DO UPDATE SET
+                question = EXCLUDED.question,
+                answer = EXCLUDED.answer,
+                contexts = EXCLUDED.contexts,
+                input_hash = EXCLUDED.input_hash,
+                created_at = now()
+        """), rows)
+
+
+def get_precomputed_answers(index_version: str, department: str, position: str) -> Dict[str, str]:
+    with conn() as c:
+        rows = c.execute(text("""
+            SELECT question_key, answer
+            FROM precomputed_answers
+            WHERE index_version = :v AND department = :d AND position = :p
+        """), {"v": index_version, "d": department, "p": position}).fetchall()
+    return {r.question_key: r.answer for r in rows}
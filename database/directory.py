@@ -0,0 +1,107 @@
+# Employee directory lookups for the assistant's directory tool.
+#
+# Parameterised, index-backed queries over `employees` with a whitelist of returned fields
+# (never salary, phone number or ids), a result-size cap and a short-TTL cache.
+
+from __future__ import annotations
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from database.db import conn
+
+logger = logging.getLogger(__name__)
+
+DIRECTORY_FIELDS = ("name", "lastname", "email", "position", "department", "location", "supervisor", "skills")
+DIRECTORY_MAX_RESULTS = int(os.getenv("DIRECTORY_MAX_RESULTS", "10"))
+DIRECTORY_CACHE_TTL = float(os.getenv("DIRECTORY_CACHE_TTL", "60"))
+DIRECTORY_CACHE_SIZE = 256
+
+DIRECTORY_INDEXES_SQL = (
+    "CREATE INDEX IF NOT EXISTS idx_employees_department_lower ON employees (lower(department))",
+    "CREATE INDEX IF NOT EXISTS idx_employees_location_lower ON employees (lower(location))",
+    "CREATE INDEX IF NOT EXISTS idx_employees_skills ON employees USING GIN (skills jsonb_path_ops)",
+)
+
+_indexes_ready = False
+_cache: Dict[Tuple, Tuple[float, Dict[str, Any]]] = {}
+_cache_lock = threading.Lock()
+
+
+def ensure_directory_indexes() -> None:
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    with conn() as c:
+        for statement in DIRECTORY_INDEXES_SQL:
+            c.execute(text(statement))
+    _indexes_ready = True
+
+
+def search_employees(
+    department: Optional[str] = None,
+    location: Optional[str] = None,
+    skill: Optional[str] = None,
+    limit: int = DIRECTORY_MAX_RESULTS,
+) -> Dict[str, Any]:
+    """
+    Find employees by department, location and/or skill (all optional, combined with AND).
+
+    Returns {"results": [...], "truncated": bool}; at most `limit` rows (capped at
+    DIRECTORY_MAX_RESULTS), each with only DIRECTORY_FIELDS.
+    """
+    department = (department or "").strip() or None
+    location = (location or "").strip() or None
+    skill = (skill or "").strip() or None
+    limit = max(1, min(int(limit), DIRECTORY_MAX_RESULTS))
+
+    if not (department or location or skill):
+        return {"results": [], "truncated": False, "error": "Provide a department, location or skill."}
+
+    key = (department and department.lower(), location and location.lower(), skill, limit)
+    now = time.monotonic()
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit and now - hit[0] < DIRECTORY_CACHE_TTL:
+            return hit[1]
+
+    try:
+        ensure_directory_indexes()
+    except Exception as e:
+        # Lookups still work without the indexes, just slower
+        logger.warning("Could not create directory indexes: %s", e)
+
+    # Only fixed SQL fragments are concatenated; every value is a bound parameter
+    clauses: List[str] = []
+    params: Dict[str, Any] = {"limit": limit + 1}
+    if department:
+        clauses.append("lower(department) = lower(:department)")
+        params["department"] = department
+    if location:
+        clauses.append("lower(location) = lower(:location)")
+        params["location"] = location
+    if skill:
+        clauses.append("skills @> CAST(:skills AS JSONB)")
+        params["skills"] = json.dumps([skill])
+
+    sql = text(f"""
+        SELECT {", ".join(DIRECTORY_FIELDS)}
+        FROM employees
+        WHERE {" AND ".join(clauses)}
+        ORDER BY lastname, name
+        LIMIT :limit
+    """)
+    with conn() as c:
+        rows = [dict(r) for r in c.execute(sql, params).mappings().all()]
+
+    result = {"results": rows[:limit], "truncated": len(rows) > limit}
+    with _cache_lock:
+        if len(_cache) >= DIRECTORY_CACHE_SIZE:
+            _cache.clear()
+        _cache[key] = (now, result)
+    return result
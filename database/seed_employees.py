@@ -1,5 +1,6 @@
 from data.employees import generate_employee_data
 from database.db import insert_employees
+from database.directory import ensure_directory_indexes
 import uuid
 import json
 
@@ -10,6 +11,7 @@ def main():
         e["employee_id"] = str(uuid.uuid4())
         e["skills"] = json.dumps(e["skills"])  # store list as JSONB text
     insert_employees(employees)
+    ensure_directory_indexes()
     print("✅ Seeded 50 employees successfully.")
 
 
@@ -1,28 +1,64 @@
+import base64
+import logging
+import time
+import uuid
 import streamlit as st
 from datetime import datetime
+from voice.pipeline import SentenceSplitter, SentenceTTS, VoiceTurn
 from voice.speech_to_text import transcribe_audio
-from voice.text_to_speech import tts_generate
+from voice.text_to_speech import GTTS_AVAILABLE, gtts_bytes, tts_generate
+from session_store import (
+    SESSION_MAX_MESSAGES, archived_messages, cancel_generation, enforce_caps, session_bytes,
+)
+from streaming import coalesce_stream
+from database.chat_writer import get_chat_writer
+from database.db import get_chat_history
+
+logger = logging.getLogger(__name__)
+
+HISTORY_PAGE_SIZE = 20
+OLDER_HISTORY_MAX_MESSAGES = SESSION_MAX_MESSAGES
+# Upper bound on waiting for the sentence TTS stage once the text has finished streaming
+VOICE_TTS_TIMEOUT = 30.0
 
 
 class AssistantGUI:
     def __init__(self, assistant):
         self.assistant = assistant
         self.employee_information = assistant.employee_information
+        # The turn this run is processing, and its cancellable work (LLM stream, TTS)
+        self._turn_id = None
+        self._handles = []
 
         defaults = {
             "messages": [],
             "pending_input": None,
             "pending_origin": None,
-            "processing": False,
+            "active_turn": None,
+            "active_generation": None,
             "last_response_id": 0,
             "audio_bytes": None,
             "autoplay_audio": False,
             "last_audio_hash": None,
+            "archived_count": 0,
+            "session_evicted": False,
+            "conversation_id": str(uuid.uuid4()),
+            "history_loaded": False,
+            "history_cursor": None,
+            "older_history": [],
+            "older_history_hidden": 0,
         }
         for k, v in defaults.items():
             if k not in st.session_state:
                 st.session_state[k] = v
 
+        # Resume the employee's previous conversations once per login
+        if not st.session_state["history_loaded"]:
+            st.session_state["messages"] = self._load_history_page() + st.session_state["messages"]
+            st.session_state["history_loaded"] = True
+            # Where "Load earlier conversations" starts again once older pages are evicted
+            st.session_state["history_resume_cursor"] = st.session_state["history_cursor"]
+
     # ----------------------------------------------------------
     # 🎨 CSS: Enhanced styling with fixed voice input bar
     # ----------------------------------------------------------
@@ -103,22 +139,130 @@ class AssistantGUI:
     # ----------------------------------------------------------
     # 🧠 Core response generator
     # ----------------------------------------------------------
-    def get_response(self, user_input: str):
-        return self.assistant.get_response(user_input)
+    def get_response(self, user_input: str, first_turn: bool = False):
+        generation = self.assistant.get_response(user_input, first_turn=first_turn)
+        self._track(generation)
+        # Tokens are batched into frames so the browser gets a few deltas per second, not one per token
+        return coalesce_stream(generation)
+
+    # ----------------------------------------------------------
+    # ✋ Turn ownership + cancellation
+    # ----------------------------------------------------------
+    def _is_current_turn(self) -> bool:
+        return self._turn_id is not None and st.session_state.get("active_turn") == self._turn_id
+
+    def _track(self, handle):
+        # Kept so a newer question, logout or a stopped run can abort it. If a newer question
+        # has already taken over, this turn's work is cancelled straight away.
+        self._handles.append(handle)
+        if self._is_current_turn():
+            st.session_state["active_generation"] = handle
+        else:
+            handle.cancel()
+        return handle
+
+    def _synthesize_reply(self, text: str):
+        """Audio for a whole text reply; cancellable between sentences when gTTS is used."""
+        if not GTTS_AVAILABLE:
+            # Local pyttsx3 synthesis runs in-process and cannot be interrupted
+            return tts_generate(text, offline=False)
+
+        tts = self._track(SentenceTTS(gtts_bytes))
+        splitter = SentenceSplitter()
+        for sentence in [*splitter.feed(text), splitter.flush()]:
+            if sentence:
+                tts.submit(sentence)
+        tts.close()
+
+        # Polled rather than one long join, so a newer question's cancel() frees this run at once.
+        # No deadline: like tts_generate, a long reply simply takes longer.
+        while tts.is_alive() and not tts.cancelled and not tts.failed:
+            tts.join(0.1)
+
+        if tts.failed:
+            # Never leave gaps: redo the whole reply through tts_generate (cached, pyttsx3 fallback)
+            tts.cancel()
+            return tts_generate(text, offline=False) if self._is_current_turn() else None
+        if tts.cancelled:
+            return None
+        return b"".join(tts.clips) or None
+
+    # ----------------------------------------------------------
+    # 🗃️ Transcript persistence (write-behind) + paged history
+    # ----------------------------------------------------------
+    def _persist(self, role: str, content: str, origin: str = None):
+        # Only enqueues; the chat writer thread batches the inserts into Postgres
+        employee_id = self.employee_information.get("employee_id")
+        if not employee_id:
+            return
+        try:
+            get_chat_writer().enqueue(
+                st.session_state["conversation_id"], employee_id, role, content, origin
+            )
+        except Exception as e:
+            logger.warning("Could not queue chat message for persistence: %s", e)
+
+    def _load_history_page(self):
+        """Fetch the page of messages before the current cursor and move the cursor back."""
+        employee_id = self.employee_information.get("employee_id")
+        if not employee_id:
+            return []
+        try:
+            page = get_chat_history(
+                employee_id,
+                before_id=st.session_state["history_cursor"],
+                limit=HISTORY_PAGE_SIZE,
+            )
+        except Exception as e:
+            logger.warning("Could not load chat history: %s", e)
+            return []
+
+        # A short page means there is nothing older left to load
+        st.session_state["history_cursor"] = (
+            page[0]["id"] if len(page) == HISTORY_PAGE_SIZE else None
+        )
+        return [{"role": row["role"], "content": row["content"]} for row in page]
 
     # ----------------------------------------------------------
     # 💬 Chat message renderer
     # ----------------------------------------------------------
+    def _render_message(self, msg):
+        avatar = "👤" if msg["role"] == "user" else "🧰"
+        with st.chat_message(msg["role"], avatar=avatar):
+            st.markdown(msg["content"])
+
     def render_messages(self):
-        if not st.session_state["messages"]:
+        # Earlier conversations from Postgres, one page at a time
+        if st.session_state["history_cursor"] is not None:
+            if st.button("⬆️ Load earlier conversations"):
+                older = self._load_history_page() + st.session_state["older_history"]
+                # Bounded like the live transcript: keep the oldest pages, the ones being paged to
+                overflow = len(older) - OLDER_HISTORY_MAX_MESSAGES
+                if overflow > 0:
+                    del older[-overflow:]
+                    st.session_state["older_history_hidden"] += overflow
+                st.session_state["older_history"] = older
+                st.rerun()
+        for msg in st.session_state["older_history"]:
+            self._render_message(msg)
+        if st.session_state["older_history_hidden"]:
+            st.caption(
+                f"… {st.session_state['older_history_hidden']} more loaded messages hidden to save memory"
+            )
+
+        # Older messages are archived to keep session memory bounded; shown on demand only
+        if st.session_state["archived_count"]:
+            if st.toggle(f"🗄️ Show {st.session_state['archived_count']} earlier messages"):
+                for msg in archived_messages():
+                    self._render_message(msg)
+
+        if not st.session_state["messages"] and not st.session_state["archived_count"]:
             with st.chat_message("ai", avatar="🧰"):
                 st.markdown(
                     "**Umbrella Assistant Online.** How can I assist you today?")
 
         for msg in st.session_state["messages"]:
-            avatar = "👤" if msg["role"] == "user" else "🧰"
-            with st.chat_message(msg["role"], avatar=avatar):
-                st.markdown(msg["content"])
+            self._render_message(msg)
 
     # ----------------------------------------------------------
     # 🎙️ Voice input bar (fixed at bottom)
@@ -142,17 +286,19 @@ class AssistantGUI:
 
                 # Only process if this is new audio
                 if audio_hash != st.session_state.get("last_audio_hash"):
+                    voice_started_at = time.perf_counter()
                     with st.status("🎧 Processing your voice input...", expanded=True) as status:
                         text = transcribe_audio(audio_bytes)
 
                     if text:
                         st.success(f"🗣️ You said: **{text}**")
+                        # Answered later in this same run (see render), no rerun needed
                         st.session_state["pending_input"] = text
                         st.session_state["pending_origin"] = "voice"
+                        st.session_state["voice_started_at"] = voice_started_at
                         st.session_state["last_audio_hash"] = audio_hash
                         status.update(
                             label="✅ Transcription complete!", state="complete")
-                        st.rerun()
                     else:
                         status.update(
                             label="⚠️ Could not transcribe audio", state="error")
@@ -174,16 +320,15 @@ class AssistantGUI:
     # ⚙️ Process a single query (voice or text)
     # ----------------------------------------------------------
     def _process_once(self):
-        # Prevent duplicate processing
-        if st.session_state["processing"]:
-            return
-
         # Check if there's pending input to process
         if not st.session_state["pending_input"]:
             return
 
-        # Lock processing
-        st.session_state["processing"] = True
+        # A new question takes over from any turn still running: its LLM stream and TTS are
+        # aborted now, and that run stops at its next checkpoint instead of storing its reply.
+        cancel_generation()
+        self._turn_id = uuid.uuid4().hex
+        st.session_state["active_turn"] = self._turn_id
 
         try:
             user_input = st.session_state["pending_input"]
@@ -193,41 +338,151 @@ class AssistantGUI:
             st.session_state["pending_input"] = None
             st.session_state["pending_origin"] = None
 
+            # Precomputed answers are role-generic, so they are only used to open a conversation
+            first_turn = not st.session_state["messages"] and not st.session_state.get("archived_count")
+
             # 1️⃣ Display user message immediately
             st.session_state["messages"].append(
                 {"role": "user", "content": user_input}
             )
+            self._persist("user", user_input, origin)
 
             # Render the user message
             with st.chat_message("user", avatar="👤"):
                 st.markdown(user_input)
 
             # 2️⃣ Generate assistant reply with streaming
+            pipelined = origin == "voice" and GTTS_AVAILABLE
             with st.chat_message("ai", avatar="🧰"):
-                with st.spinner("Thinking..."):
-                    stream = self.get_response(user_input)
-                    response_text = st.write_stream(stream)
+                if pipelined:
+                    # Voice: retrieval, generation and sentence-level TTS overlap
+                    response_text = self._voice_reply(user_input, first_turn)
+                else:
+                    with st.spinner("Thinking..."):
+                        stream = self.get_response(user_input, first_turn)
+                        response_text = st.write_stream(stream)
+
+            if not self._is_current_turn():
+                # Superseded while generating; the newer turn owns the transcript now
+                return
 
             # Store assistant message
             st.session_state["messages"].append(
                 {"role": "ai", "content": response_text}
             )
+            self._persist("ai", response_text, origin)
             st.session_state["last_response_id"] += 1
 
             # 3️⃣ Generate audio (always generate, but control autoplay)
-            response_str = ' '.join(response_text) if isinstance(
-                response_text, list) else str(response_text)
+            if not pipelined:
+                response_str = ' '.join(response_text) if isinstance(
+                    response_text, list) else str(response_text)
 
-            st.session_state["audio_bytes"] = tts_generate(
-                response_str, offline=False
-            )
+                audio = self._synthesize_reply(response_str)
+                if not self._is_current_turn():
+                    return
+                st.session_state["audio_bytes"] = audio
+
+                # Set autoplay based on origin: voice queries autoplay, text queries don't
+                st.session_state["autoplay_audio"] = (origin == "voice")
 
-            # Set autoplay based on origin: voice queries autoplay, text queries don't
-            st.session_state["autoplay_audio"] = (origin == "voice")
+            # Keep the transcript and audio held in memory bounded
+            enforce_caps()
 
         finally:
-            # Unlock processing
-            st.session_state["processing"] = False
+            # Also runs when Streamlit stops this run (new input, closed tab): abort this
+            # turn's LLM request and TTS work instead of letting them finish unseen.
+            for handle in self._handles:
+                handle.cancel()
+            # Release the turn unless a newer one has already taken over
+            if self._is_current_turn():
+                st.session_state["active_turn"] = None
+                st.session_state["active_generation"] = None
+
+    # ----------------------------------------------------------
+    # 🎧 Pipelined voice reply (streamed text + sentence-level audio)
+    # ----------------------------------------------------------
+    def _voice_reply(self, user_input: str, first_turn: bool = False):
+        turn = VoiceTurn(
+            self.assistant,
+            user_input,
+            synthesize=gtts_bytes,
+            started_at=st.session_state.pop("voice_started_at", None) or time.perf_counter(),
+            first_turn=first_turn,
+        )
+        self._track(turn)
+        head_slot = st.empty()
+        head_id = f"voice-head-{st.session_state['last_response_id']}"
+        head = {"rendered": False}
+
+        def render_head():
+            if not head["rendered"] and turn.tts.clips:
+                self._render_voice_clip(head_slot, head_id, turn.tts.clips[0])
+                head["rendered"] = True
+
+        def stream():
+            for token in turn.tokens():
+                yield token
+                # The first sentence starts playing while the rest is still being generated
+                render_head()
+
+        response_text = st.write_stream(coalesce_stream(stream()))
+
+        # Text is done; play the first clip as soon as it exists, then queue the rest after it
+        deadline = time.perf_counter() + VOICE_TTS_TIMEOUT
+        while not head["rendered"] and turn.tts.is_alive() and time.perf_counter() < deadline:
+            time.sleep(0.05)
+            render_head()
+        turn.tts.join(max(0.0, deadline - time.perf_counter()))
+        if not self._is_current_turn():
+            # Superseded: the newer turn owns the audio player
+            return response_text
+        render_head()
+
+        clips = list(turn.tts.clips)
+        if len(clips) > 1:
+            self._render_voice_tail(head_id, b"".join(clips[1:]))
+
+        # Full reply kept for replay; it has already auto-played
+        st.session_state["audio_bytes"] = b"".join(clips) or None
+        st.session_state["autoplay_audio"] = False
+
+        metrics = turn.metrics()
+        logger.info("Voice turn latency: %s", metrics)
+        if metrics["first_audio_s"] is not None:
+            st.caption(
+                f"⏱️ First audio in {metrics['first_audio_s']:.2f}s "
+                f"(transcribed {metrics['transcription_s']:.2f}s, "
+                f"first token {metrics['first_token_s'] or 0:.2f}s)"
+            )
+        return response_text
+
+    def _render_voice_clip(self, slot, element_id: str, clip: bytes):
+        audio_b64 = base64.b64encode(clip).decode()
+        slot.markdown(
+            f"""
+            <audio id="{element_id}" autoplay style="display:none;">
+                <source src="data:audio/mp3;base64,{audio_b64}" type="audio/mp3">
+            </audio>
+            """,
+            unsafe_allow_html=True,
+        )
+
+    def _render_voice_tail(self, head_id: str, clip: bytes):
+        # Plays the remaining sentences once the first clip has finished
+        import streamlit.components.v1 as components
+        audio_b64 = base64.b64encode(clip).decode()
+        components.html(
+            f"""
+            <script>
+            const tail = new Audio("data:audio/mp3;base64,{audio_b64}");
+            const head = window.parent.document.getElementById("{head_id}");
+            const play = () => tail.play().catch(() => {{}});
+            if (!head || head.ended) {{ play(); }} else {{ head.addEventListener("ended", play); }}
+            </script>
+            """,
+            height=0,
+        )
 
     # ----------------------------------------------------------
     # 🔊 Audio renderer with conditional autoplay
@@ -237,7 +492,6 @@ class AssistantGUI:
             return
 
         # Convert audio bytes to base64
-        import base64
         audio_b64 = base64.b64encode(
             st.session_state["audio_bytes"]
         ).decode()
@@ -296,6 +550,7 @@ class AssistantGUI:
             st.caption(
                 f"🕐 Active Session: {datetime.now().strftime('%H:%M:%S')}"
             )
+            st.caption(f"🧠 Transcript + audio in memory: ~{session_bytes() / 1024:.1f} KB")
 
     # ----------------------------------------------------------
     # 🚀 Main entry point
@@ -310,14 +565,20 @@ class AssistantGUI:
         # Render existing messages
         self.render_messages()
 
+        # Slots for the current turn and its audio, filled below
+        turn_slot = st.container()
+        audio_slot = st.container()
+
+        # Render voice section (fixed position); a new transcript is answered in this same run
+        self._voice_section()
+
         # Process any pending input
-        self._process_once()
+        with turn_slot:
+            self._process_once()
 
         # Render audio player if available
-        self._render_audio_player()
-
-        # Render voice section (fixed position)
-        self._voice_section()
+        with audio_slot:
+            self._render_audio_player()
 
         # Render text input (at bottom)
         self._text_row()
@@ -1,16 +1,10 @@
 SYSTEM_PROMPT = """
 **You are an AI onboarding assistant for the Umbrella Corporation**, a multinational conglomerate involved in high-level research, biotechnology, and pharmaceuticals. Your primary function is to guide new employees through the onboarding process, helping them navigate the corporation’s internal policies and regulations. Due to the highly classified nature of the company’s work, you maintain a reserved and calculated demeanor. Your communication is precise, controlled, and selectively informative. You only provide information that is deemed strictly necessary for the task at hand.
 
-You have access to two important data sources:
+You have access to two important data sources, provided after these guidelines:
 - **Employee Information**: Details about the employee interacting with you.
 - **Company Policies**: Retrieved from the internal regulations document stored in a vector database.
 
-You are currently interacting with the following employee:
-- **Employee Information**: {employee_information}
-
-Based on the employee's question, you have also retrieved relevant policy information:
-- **Retrieved Policy Information**: {retrieved_policy_information}
-
 Your task is to assist the employee with onboarding by providing carefully curated responses. While you are professional, your demeanor reflects the seriousness of Umbrella Corporation’s operations. You withhold unnecessary details and never reveal more than what is absolutely required. Follow the guidelines below to ensure a controlled and secure conversation:
 
 ### Guidelines:
@@ -44,9 +38,57 @@ Your task is to assist the employee with onboarding by providing carefully curat
 7. **Veiled Warnings**:
    - If an employee asks about any potentially risky actions or procedures, calmly remind them of the **strict repercussions** for any violations of security protocol. Deliver these warnings with professionalism, never in an overtly threatening way, but with a subtle, controlled intensity.
 
-Now, proceed to answer the employee's question. Your response should be direct, secure, and carefully limited to what is necessary, adhering to the guidelines outlined above.
+8. **Employee Directory**:
+   - For questions about other employees (who works in a department, at a location, or has a given skill), use the `employee_directory` tool instead of guessing.
+   - Share only what the tool returns. Never disclose salaries, phone numbers or other personal records.
     """
 
+# SYSTEM_PROMPT above is fully static so it forms an identical prefix for every user and turn,
+# which lets the provider reuse its prompt cache. Per-user and per-turn data goes in the
+# templates below, which the Assistant places after it.
+
+EMPLOYEE_PROMPT = """
+You are currently interacting with the following employee:
+{employee_information}
+"""
+
+CONTEXT_PROMPT = """
+Based on the employee's latest question, you have retrieved relevant policy information:
+{retrieved_policy_information}
+
+Now, proceed to answer the employee's question. Your response should be direct, secure, and carefully limited to what is necessary, adhering to the guidelines outlined above.
+"""
+
+# Only the profile fields the assistant needs; never salary, phone number or internal ids.
+EMPLOYEE_FIELDS = (
+    ("Name", ("name", "lastname")),
+    ("Position", ("position",)),
+    ("Department", ("department",)),
+    ("Location", ("location",)),
+    ("Supervisor", ("supervisor",)),
+    ("Hire date", ("hire_date",)),
+    ("Skills", ("skills",)),
+)
+
+
+def format_employee_information(employee):
+    if not employee:
+        return "Unknown employee."
+
+    lines = []
+    for label, keys in EMPLOYEE_FIELDS:
+        values = []
+        for key in keys:
+            value = employee.get(key)
+            if isinstance(value, (list, tuple)):
+                value = ", ".join(str(v) for v in value)
+            if value:
+                values.append(str(value))
+        if values:
+            lines.append(f"- {label}: {' '.join(values)}")
+    return "\n".join(lines)
+
+
 WELCOME_MESSAGE = """
     Welcome to Umbrella Corporation.
     Your integration into our operations has been noted.
@@ -0,0 +1,214 @@
+# Batched, cached embedding service shared by query-time retrieval and ingestion.
+
+from __future__ import annotations
+import hashlib
+import os
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+def normalize_text(text: str) -> str:
+    return " ".join((text or "").lower().split())
+
+
+def normalize_vectors(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalise every row in one vectorised pass (zero rows stay zero)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.maximum(norms, 1e-12, out=norms)
+    return vectors / norms
+
+
+# ----------------------------------------------------------
+# Backends: anything with `encode(texts) -> np.ndarray`
+# ----------------------------------------------------------
+
+class OpenAIBackend:
+    def __init__(self, model: str = "text-embedding-3-small"):
+        from langchain_openai import OpenAIEmbeddings
+        self._client = OpenAIEmbeddings(model=model)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self._client.embed_documents(texts), dtype=np.float32)
+
+
+class SentenceTransformerBackend:
+    """Local CPU model, loaded on first use."""
+
+    def __init__(self, model: str = "sentence-transformers/all-MiniLM-L6-v2", device: str = "cpu"):
+        self.model_name = model
+        self.device = device
+        self._model = None
+        self._lock = threading.Lock()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import SentenceTransformer
+                self._model = SentenceTransformer(self.model_name, device=self.device)
+        return np.asarray(self._model.encode(texts, convert_to_numpy=True), dtype=np.float32)
+
+
+class HashingBackend:
+    """Deterministic, dependency-free feature hashing. Intended for tests and offline runs."""
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in re.findall(r"\w+", text.lower()):
+                h = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+                out[row, h % self.dim] += 1.0 if (h >> 63) & 1 else -1.0
+        return out
+
+
+BACKENDS = {
+    "openai": OpenAIBackend,
+    "local": SentenceTransformerBackend,
+    "hashing": HashingBackend,
+}
+
+
+# ----------------------------------------------------------
+# Service
+# ----------------------------------------------------------
+
+class EmbeddingService(Embeddings):
+    """
+    LangChain-compatible embeddings with:
+      - an LRU cache of query embeddings keyed on normalised text,
+      - micro-batching of concurrent `embed_query` calls (across sessions) into one backend call,
+      - fixed-size batches for `embed_documents` during ingestion.
+    """
+
+    def __init__(
+        self,
+        backend,
+        batch_size: int = 64,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        cache_size: int = 2048,
+    ):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.cache_size = cache_size
+
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._queue: "queue.Queue[tuple[str, str, Future]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+
+    # ---- ingestion path ----
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        out: List[List[float]] = []
+        for i in range(0, len(texts), self.batch_size):
+            batch = texts[i:i + self.batch_size]
+            out.extend(normalize_vectors(self.backend.encode(batch)).tolist())
+        return out
+
+    # ---- query path ----
+    def embed_query(self, text: str) -> List[float]:
+        # The normalised text is only the cache / dedup key; the backend embeds the text as given,
+        # like embed_documents, so queries stay in the same vector space as the documents.
+        key = normalize_text(text)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((key, text, future))
+        return future.result()
+
+    def _cache_get(self, key: str) -> Optional[List[float]]:
+        with self._cache_lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+            return vector
+
+    def _cache_put(self, key: str, vector: List[float]) -> None:
+        with self._cache_lock:
+            self._cache[key] = vector
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="embedding-batcher", daemon=True
+                )
+                self._worker.start()
+
+    def _collect_batch(self):
+        # Block for the first request, then gather more until the window closes or the batch is full
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect_batch()
+            # Identical concurrent questions are embedded once, using the first-seen raw text
+            texts: Dict[str, str] = {}
+            for key, text, _ in batch:
+                texts.setdefault(key, text)
+            try:
+                vectors = normalize_vectors(self.backend.encode(list(texts.values()))).tolist()
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            by_key = dict(zip(texts, vectors))
+            for key, vector in by_key.items():
+                self._cache_put(key, vector)
+            for key, _, future in batch:
+                future.set_result(by_key[key])
+
+
+_service: Optional[EmbeddingService] = None
+_service_lock = threading.Lock()
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Process-wide embedding service; backend chosen by EMBEDDING_BACKEND (openai | local | hashing)."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                backend = BACKENDS[os.getenv("EMBEDDING_BACKEND", "openai")]()
+                _service = EmbeddingService(
+                    backend,
+                    max_batch_size=int(os.getenv("EMBEDDING_MAX_BATCH", "32")),
+                    max_wait_ms=float(os.getenv("EMBEDDING_MAX_WAIT_MS", "5")),
+                    cache_size=int(os.getenv("EMBEDDING_CACHE_SIZE", "2048")),
+                )
+    return _service
@@ -0,0 +1,212 @@
+# Process-wide handle on the current policy index generation, with hot swap.
+#
+# Every Assistant in the process leases the current generation for the duration of a retrieval.
+# When a new generation is published (by `python -m rag.ingest` in another process, or by
+# `PolicyIndex.rebuild()` in this one) it is opened while the old one keeps serving, then swapped
+# in under a lock. The old generation is closed as soon as its last lease is returned, so two
+# full copies are only held while in-flight retrievals finish.
+
+from __future__ import annotations
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from rag.ingest import (
+    MANIFEST_FILE,
+    PDF_PATH,
+    PERSIST_DIR,
+    current_generation,
+    generation_path,
+    get_embeddings,
+    ingest,
+    open_generation,
+    open_generation_client,
+    read_manifest,
+)
+
+logger = logging.getLogger(__name__)
+
+INDEX_POLL_INTERVAL = float(os.getenv("INDEX_POLL_INTERVAL", "5"))
+
+
+class IndexGeneration:
+    def __init__(self, generation_id: str, version: str, store, path: Path, client=None):
+        self.id = generation_id
+        self.version = version
+        self.store = store
+        self.path = path
+        self.client = client
+        self.leases = 0
+        self.retired = False
+
+
+class PolicyIndex:
+    """The current index generation for this process; see the module comment."""
+
+    def __init__(self, persist_directory: Path = PERSIST_DIR, embedding=None,
+                 poll_interval: float = INDEX_POLL_INTERVAL):
+        self.persist_directory = Path(persist_directory)
+        # Built on first use: with nothing ingested the app must not need embedding credentials
+        self._embedding = embedding
+        self.poll_interval = poll_interval
+
+        self._lock = threading.Lock()  # guards the pointer and the lease counts
+        self._refresh_lock = threading.Lock()  # one thread opens a new generation at a time
+        self._current: Optional[IndexGeneration] = None
+        self._retired: List[IndexGeneration] = []
+        self._manifest_mtime: Optional[int] = None
+        self._next_poll = 0.0
+
+        self.refresh(force=True)
+
+    @property
+    def embedding(self):
+        if self._embedding is None:
+            self._embedding = get_embeddings()
+        return self._embedding
+
+    @property
+    def generation_id(self) -> Optional[str]:
+        current = self._current
+        return current.id if current else None
+
+    @property
+    def version(self) -> Optional[str]:
+        self._maybe_refresh()
+        current = self._current
+        return current.version if current else None
+
+    @contextmanager
+    def lease(self) -> Iterator[Optional[IndexGeneration]]:
+        """Pin the current generation (None if nothing has been ingested) while the block runs."""
+        self._maybe_refresh()
+        with self._lock:
+            generation = self._current
+            if generation is not None:
+                generation.leases += 1
+        try:
+            yield generation
+        finally:
+            if generation is not None:
+                self._release(generation)
+
+    def leased_ids(self) -> List[str]:
+        with self._lock:
+            return [g.id for g in [self._current, *self._retired] if g is not None]
+
+    # ----------------------------------------------------------
+    # Swapping
+    # ----------------------------------------------------------
+
+    def _maybe_refresh(self) -> None:
+        now = time.monotonic()
+        if now < self._next_poll:
+            return
+        self._next_poll = now + self.poll_interval
+        try:
+            self.refresh()
+        except Exception as e:
+            # Keep serving the generation we have
+            logger.warning("Policy index refresh failed: %s", e)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Swap to the manifest's current generation if it changed. Returns True on a swap."""
+        # Retrievals never wait for another thread's refresh; they use the current generation
+        if not self._refresh_lock.acquire(blocking=force):
+            return False
+        try:
+            try:
+                mtime = (self.persist_directory / MANIFEST_FILE).stat().st_mtime_ns
+            except FileNotFoundError:
+                return False
+            if not force and mtime == self._manifest_mtime:
+                return False
+            self._manifest_mtime = mtime
+
+            entry = current_generation(read_manifest(self.persist_directory))
+            if entry is None or entry["id"] == self.generation_id:
+                return False
+
+            # Opened while the old generation keeps serving, on its own client so it can be released
+            client = open_generation_client(entry["id"], self.persist_directory)
+            store = open_generation(entry["id"], self.persist_directory, self.embedding, client=client)
+            self._swap(IndexGeneration(
+                entry["id"], entry["version"], store, generation_path(entry["id"], self.persist_directory),
+                client=client,
+            ))
+            return True
+        finally:
+            self._refresh_lock.release()
+
+    def _swap(self, generation: IndexGeneration) -> None:
+        with self._lock:
+            old, self._current = self._current, generation
+            close_now = False
+            if old is not None:
+                old.retired = True
+                close_now = old.leases == 0
+                if not close_now:
+                    self._retired.append(old)
+        logger.info("Policy index now serving generation %s", generation.id)
+        if close_now:
+            self._close(old)
+
+    def _release(self, generation: IndexGeneration) -> None:
+        with self._lock:
+            generation.leases -= 1
+            close_now = generation.retired and generation.leases == 0
+            if close_now:
+                self._retired.remove(generation)
+        if close_now:
+            self._close(generation)
+
+    @staticmethod
+    def _close(generation: IndexGeneration) -> None:
+        generation.store = None
+        client, generation.client = generation.client, None
+        if client is not None:
+            try:
+                # Releases this generation's Chroma system and its file handles
+                client.close()
+            except Exception as e:
+                logger.warning("Could not release Chroma client for generation %s: %s", generation.id, e)
+                return
+        logger.info("Closed policy index generation %s", generation.id)
+
+    # ----------------------------------------------------------
+    # Rebuilding
+    # ----------------------------------------------------------
+
+    def rebuild(self, pdf_path: Path = PDF_PATH, background: bool = True) -> Optional[threading.Thread]:
+        """Build and publish a new generation, then swap to it. The current one serves meanwhile."""
+        def build():
+            try:
+                generation = ingest(pdf_path, self.persist_directory, self.embedding,
+                                    in_use=self.leased_ids())
+                self.refresh(force=True)
+                logger.info("Rebuilt policy index: generation %s", generation["id"])
+            except Exception as e:
+                logger.error("Policy index rebuild failed: %s", e)
+
+        if not background:
+            build()
+            return None
+        thread = threading.Thread(target=build, name="policy-index-build", daemon=True)
+        thread.start()
+        return thread
+
+
+_index: Optional[PolicyIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_policy_index() -> PolicyIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = PolicyIndex()
+        return _index
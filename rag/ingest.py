@@ -0,0 +1,247 @@
+# Policy PDF ingestion into the Chroma vector store, with chunk-level metadata.
+#
+# Every ingest builds a new, immutable index generation next to the one being served:
+#
+#   data/vectorstore/
+#     manifest.json                 {"current": <id>, "generations": [{id, version, created_at, chunks}]}
+#     generations/<id>/             one Chroma persist directory per generation
+#
+# The manifest is replaced atomically once the new generation is complete, so readers only ever see
+# a finished index. Running apps pick it up through rag.index.PolicyIndex without a restart.
+
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from rag.metadata import SUBSECTION_RE, chunk_metadata
+
+ROOT = Path(__file__).resolve().parent.parent
+PDF_PATH = ROOT / "data" / "umbrella_corp_policies.pdf"
+PERSIST_DIR = ROOT / "data" / "vectorstore"
+COLLECTION_NAME = "umbrella_policies"
+
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 150
+MANIFEST_FILE = "manifest.json"
+GENERATIONS_DIR = "generations"
+# Generations kept on disk: the current one plus the previous, which other processes may still
+# be serving until they notice the new manifest. A separate ingest process cannot see which
+# generations the app workers still have open, so an older one is only deleted once it has been
+# superseded for INDEX_PRUNE_GRACE seconds (several INDEX_POLL_INTERVALs): by then every worker has
+# swapped away from it. Raise it if workers poll less often or retrievals run longer.
+KEEP_GENERATIONS = int(os.getenv("INDEX_KEEP_GENERATIONS", "2"))
+PRUNE_GRACE = float(os.getenv("INDEX_PRUNE_GRACE", "60"))
+
+logger = logging.getLogger(__name__)
+
+
+def compute_index_version(pdf_path: Path = PDF_PATH) -> str:
+    """Content hash of everything that shapes the index: the PDF, chunking and embedding backend."""
+    h = hashlib.sha256(Path(pdf_path).read_bytes())
+    h.update(f"{CHUNK_SIZE}:{CHUNK_OVERLAP}:{os.getenv('EMBEDDING_BACKEND', 'openai')}".encode())
+    return h.hexdigest()[:16]
+
+
+# ----------------------------------------------------------
+# Manifest and generations
+# ----------------------------------------------------------
+
+def read_manifest(persist_directory: Path = PERSIST_DIR) -> Dict[str, Any]:
+    path = Path(persist_directory) / MANIFEST_FILE
+    if not path.exists():
+        return {"current": None, "generations": []}
+    return json.loads(path.read_text())
+
+
+def write_manifest(manifest: Dict[str, Any], persist_directory: Path = PERSIST_DIR) -> None:
+    # Write-then-rename: readers see either the old or the new manifest, never a partial one
+    path = Path(persist_directory) / MANIFEST_FILE
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp, path)
+
+
+def current_generation(manifest: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    return next((g for g in manifest["generations"] if g["id"] == manifest["current"]), None)
+
+
+def generation_path(generation_id: str, persist_directory: Path = PERSIST_DIR) -> Path:
+    return Path(persist_directory) / GENERATIONS_DIR / generation_id
+
+
+def load_index_version(persist_directory: Path = PERSIST_DIR) -> Optional[str]:
+    generation = current_generation(read_manifest(persist_directory))
+    return generation["version"] if generation else None
+
+
+def load_policy_text(pdf_path: Path = PDF_PATH) -> str:
+    from pypdf import PdfReader
+
+    reader = PdfReader(str(pdf_path))
+    text = "\n".join(page.extract_text() or "" for page in reader.pages)
+    # The PDF uses tabs between words
+    return re.sub(r"[ \t]+", " ", text)
+
+
+def split_policy_sections(text: str) -> List[Tuple[str, str, str]]:
+    """Split the policy text into (section_id, title, body) per subsection."""
+    headers = list(SUBSECTION_RE.finditer(text))
+    sections = []
+    for i, m in enumerate(headers):
+        section_id = f"{m.group(1)}.{m.group(2)}"
+        title = m.group(3).strip()
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(text)
+        body = text[m.end():end]
+
+        # The marker may wrap; prefer the full "Subsection N.M: Title" line when present
+        full = re.search(rf"^Subsection {re.escape(section_id)}: (.+)$", body, re.MULTILINE)
+        if full:
+            title = full.group(1).strip()
+            body = body[full.end():]
+
+        # Drop the "Section N: ..." heading that precedes the next section
+        body = re.sub(r"^Section \d+:.*$", "", body, flags=re.MULTILINE).strip()
+        if body:
+            sections.append((section_id, title, body))
+    return sections
+
+
+def build_documents(pdf_path: Path = PDF_PATH):
+    from langchain_core.documents import Document
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP
+    )
+    docs = []
+    for section_id, title, body in split_policy_sections(load_policy_text(pdf_path)):
+        for chunk in splitter.split_text(body):
+            docs.append(Document(
+                page_content=chunk,
+                metadata=chunk_metadata(section_id, title),
+            ))
+    return docs
+
+
+def get_embeddings():
+    from rag.embeddings import get_embedding_service
+    return get_embedding_service()
+
+
+def build_generation(pdf_path: Path = PDF_PATH, persist_directory: Path = PERSIST_DIR, embedding=None) -> Dict[str, Any]:
+    """Build a complete new generation on disk without touching the one being served."""
+    from langchain_chroma import Chroma
+
+    version = compute_index_version(pdf_path)
+    # Sortable and unique, so rebuilding the same PDF never overwrites a live generation
+    generation_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{version}"
+    path = generation_path(generation_id, persist_directory)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    try:
+        store = Chroma.from_documents(
+            documents=build_documents(pdf_path),
+            embedding=embedding or get_embeddings(),
+            collection_name=COLLECTION_NAME,
+            persist_directory=str(path),
+            collection_metadata={"hnsw:space": "cosine"},
+        )
+        chunks = store._collection.count()
+    except Exception:
+        shutil.rmtree(path, ignore_errors=True)
+        raise
+
+    return {"id": generation_id, "version": version, "created_at": time.time(), "chunks": chunks}
+
+
+def publish_generation(generation: Dict[str, Any], persist_directory: Path = PERSIST_DIR) -> None:
+    manifest = read_manifest(persist_directory)
+    manifest["generations"] = [g for g in manifest["generations"] if g["id"] != generation["id"]]
+    manifest["generations"].append(generation)
+    manifest["current"] = generation["id"]
+    write_manifest(manifest, persist_directory)
+
+
+def prune_generations(
+    persist_directory: Path = PERSIST_DIR,
+    keep: int = KEEP_GENERATIONS,
+    in_use: Iterable[str] = (),
+    grace: float = PRUNE_GRACE,
+) -> List[str]:
+    """Delete generations beyond the newest `keep` (never the current one, any in `in_use`, or
+    one superseded less than `grace` seconds ago)."""
+    manifest = read_manifest(persist_directory)
+    newest_first = sorted(manifest["generations"], key=lambda g: g["created_at"], reverse=True)
+    protected = {manifest["current"], *in_use, *(g["id"] for g in newest_first[:keep])}
+    # A generation was superseded when the next newer one was created
+    now = time.time()
+    protected.update(
+        older["id"] for newer, older in zip(newest_first, newest_first[1:])
+        if now - newer["created_at"] < grace
+    )
+
+    removed = [g["id"] for g in newest_first if g["id"] not in protected]
+    if removed:
+        manifest["generations"] = [g for g in manifest["generations"] if g["id"] not in removed]
+        write_manifest(manifest, persist_directory)
+        for generation_id in removed:
+            shutil.rmtree(generation_path(generation_id, persist_directory), ignore_errors=True)
+        logger.info("Pruned index generations: %s", ", ".join(removed))
+    return removed
+
+
+def ingest(
+    pdf_path: Path = PDF_PATH,
+    persist_directory: Path = PERSIST_DIR,
+    embedding=None,
+    in_use: Iterable[str] = (),
+) -> Dict[str, Any]:
+    generation = build_generation(pdf_path, persist_directory, embedding)
+    publish_generation(generation, persist_directory)
+    prune_generations(persist_directory, in_use=in_use)
+    return generation
+
+
+def open_generation_client(generation_id: str, persist_directory: Path = PERSIST_DIR):
+    """A Chroma client for one generation, so its owner can release it when done with it."""
+    import chromadb
+    return chromadb.PersistentClient(path=str(generation_path(generation_id, persist_directory)))
+
+
+def open_generation(generation_id: str, persist_directory: Path = PERSIST_DIR, embedding=None, client=None):
+    from langchain_chroma import Chroma
+    if client is None:
+        client = open_generation_client(generation_id, persist_directory)
+    return Chroma(
+        client=client,
+        collection_name=COLLECTION_NAME,
+        embedding_function=embedding or get_embeddings(),
+    )
+
+
+def load_vector_store(persist_directory: Path = PERSIST_DIR, embedding=None) -> Optional[object]:
+    # The current generation as of now; long-running code should lease from rag.index instead
+    generation = current_generation(read_manifest(persist_directory))
+    if generation is None:
+        return None
+    return open_generation(generation["id"], persist_directory, embedding)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    generation = ingest()
+    print(
+        f"✅ Ingested {generation['chunks']} policy chunks into generation {generation['id']} "
+        f"under {PERSIST_DIR} (index version {generation['version']})"
+    )
+
+
+if __name__ == "__main__":
+    main()
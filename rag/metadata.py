@@ -0,0 +1,83 @@
+# Chunk-level metadata for the policy index and the matching retrieval filter.
+
+from __future__ import annotations
+import re
+from typing import Any, Dict, Optional
+
+ALL = "all"
+
+# Clearance tiers as defined in policy Subsection 6.1 (Level 1 Basic .. Level 5 Eyes Only).
+DEFAULT_CLEARANCE = 2
+POSITION_CLEARANCE = {
+    "Research Scientist": 2,
+    "Software Engineer": 2,
+    "HR Specialist": 2,
+    "Operations Manager": 3,
+    "Security Officer": 3,
+}
+
+# Department scope per section / subsection number. Anything not listed applies to everyone.
+DEPARTMENT_SCOPE = {
+    "5": "R&D",             # Laboratory Safety and Protocols
+    "6.2": "Security",      # Secret Underground Facility
+    "6.3": "Security",      # Surveillance and Monitoring Systems
+    "6.4": "Security",      # Emergency Response Plan for Security Breaches
+}
+
+# Minimum clearance per section / subsection number. Anything not listed is Level 1.
+SECTION_CLEARANCE = {
+    "5.3": 3,   # Biosafety Level 3 and 4 Protocols
+    "6.2": 4,   # Secret Underground Facility
+    "8": 2,     # Doomsday Scenario Protocols
+    "8.5": 4,   # CEO's Role in Doomsday Scenario Management
+}
+
+# Region scope per section / subsection number, for sections that only apply at one site.
+# Values match the `location` values in the employees table. Anything not listed applies
+# everywhere: a section that merely mentions a place (e.g. 1.2 Company History mentions
+# Raccoon City) is still company-wide. The current policy PDF has no site-specific sections.
+REGION_SCOPE: Dict[str, str] = {}
+
+# Every subsection body opens with a "* Subsection N.M: Title" marker line
+SUBSECTION_RE = re.compile(r"^\* Subsection (\d+)\.(\d+): (.+)$", re.MULTILINE)
+
+
+def _lookup(table: Dict[str, Any], section_id: str, default: Any) -> Any:
+    # Most specific entry wins: "6.2" before "6".
+    if section_id in table:
+        return table[section_id]
+    return table.get(section_id.split(".")[0], default)
+
+
+def chunk_metadata(section_id: str, section_title: str) -> Dict[str, Any]:
+    """Build the metadata stored alongside each policy chunk."""
+    return {
+        "section": f"{section_id} {section_title}",
+        "department": _lookup(DEPARTMENT_SCOPE, section_id, ALL),
+        "region": _lookup(REGION_SCOPE, section_id, ALL),
+        "clearance": _lookup(SECTION_CLEARANCE, section_id, 1),
+    }
+
+
+def employee_clearance(employee: Dict[str, Any]) -> int:
+    if employee.get("clearance") is not None:
+        return int(employee["clearance"])
+    return POSITION_CLEARANCE.get(employee.get("position"), DEFAULT_CLEARANCE)
+
+
+def build_filter(employee: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Chroma `where` filter narrowing the candidate chunks to the employee's profile.
+
+    Returns None when there is no employee, so retrieval falls back to the full index.
+    """
+    if not employee:
+        return None
+
+    clauses = [{"clearance": {"$lte": employee_clearance(employee)}}]
+    if employee.get("department"):
+        clauses.append({"department": {"$in": [employee["department"], ALL]}})
+    if employee.get("location"):
+        clauses.append({"region": {"$in": [employee["location"], ALL]}})
+
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
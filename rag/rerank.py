@@ -0,0 +1,164 @@
+# Optional second-stage reranker: retrieve a wide candidate set, keep only the best few chunks.
+#
+# The first stage (vector search) is cheap but coarse, so recall needs many chunks, and every chunk
+# forwarded to the LLM costs prompt tokens and latency. A small cross-encoder scores all candidates
+# against the question in one batched pass on CPU and only the top `top_n` go into the prompt.
+# If scoring does not finish within RERANKER_BUDGET_MS the first-stage order is used instead.
+#
+# Off unless RERANKER is set:
+#   RERANKER=onnx   int8 ONNX cross-encoder from RERANKER_MODEL_DIR (model.onnx + tokenizer.json),
+#                   needs `onnxruntime` and `tokenizers`
+#   RERANKER=stub   deterministic lexical-overlap scorer, for tests and offline runs
+
+from __future__ import annotations
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from rag.ingest import ROOT
+
+logger = logging.getLogger(__name__)
+
+RERANKER_MODEL_DIR = Path(os.getenv("RERANKER_MODEL_DIR", str(ROOT / "data" / "reranker")))
+RERANKER_BUDGET_MS = float(os.getenv("RERANKER_BUDGET_MS", "150"))
+RERANKER_FETCH_K = int(os.getenv("RERANKER_FETCH_K", "20"))
+RERANKER_THREADS = int(os.getenv("RERANKER_THREADS", "2"))
+MAX_LENGTH = 512
+
+
+# ----------------------------------------------------------
+# Scorers: anything with `score(query, passages) -> np.ndarray`
+# ----------------------------------------------------------
+
+class OnnxCrossEncoder:
+    """Quantised (int8) cross-encoder run with onnxruntime on CPU, loaded on first use."""
+
+    def __init__(self, model_dir: Path = RERANKER_MODEL_DIR, threads: int = RERANKER_THREADS):
+        self.model_dir = Path(model_dir)
+        self.threads = threads
+        self._session = None
+        self._tokenizer = None
+        self._input_names: List[str] = []
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        with self._lock:
+            if self._session is not None:
+                return
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = self.threads
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            tokenizer = Tokenizer.from_file(str(self.model_dir / "tokenizer.json"))
+            tokenizer.enable_truncation(max_length=MAX_LENGTH)
+            tokenizer.enable_padding()
+            session = ort.InferenceSession(
+                str(self.model_dir / "model.onnx"), options, providers=["CPUExecutionProvider"]
+            )
+            self._input_names = [i.name for i in session.get_inputs()]
+            self._tokenizer = tokenizer
+            self._session = session
+
+    def score(self, query: str, passages: List[str]) -> np.ndarray:
+        self._load()
+        # One padded batch of (query, passage) pairs
+        encodings = self._tokenizer.encode_batch([(query, p) for p in passages])
+        features = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        logits = self._session.run(None, {name: features[name] for name in self._input_names})[0]
+        logits = np.asarray(logits, dtype=np.float32)
+        # (n,), (n, 1) or (n, 2) depending on the export; the last column is "relevant"
+        return logits.reshape(len(passages), -1)[:, -1]
+
+
+class StubReranker:
+    """Deterministic, dependency-free: share of query terms found in the passage."""
+
+    def score(self, query: str, passages: List[str]) -> np.ndarray:
+        terms = set(re.findall(r"\w+", query.lower()))
+        if not terms:
+            return np.zeros(len(passages), dtype=np.float32)
+        return np.array(
+            [len(terms & set(re.findall(r"\w+", p.lower()))) / len(terms) for p in passages],
+            dtype=np.float32,
+        )
+
+
+SCORERS = {
+    "onnx": OnnxCrossEncoder,
+    "stub": StubReranker,
+}
+
+
+# ----------------------------------------------------------
+# Reranker
+# ----------------------------------------------------------
+
+class Reranker:
+    """Reorders LangChain documents by scorer relevance, within a latency budget."""
+
+    def __init__(self, scorer, budget_ms: float = RERANKER_BUDGET_MS, max_in_flight: int = RERANKER_THREADS):
+        self.scorer = scorer
+        self.budget = budget_ms / 1000.0
+        self._pool = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="reranker")
+        # Scoring that overran its budget keeps running; don't queue more work behind it
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+
+    def rerank(self, query: str, docs: list, top_n: int) -> list:
+        if len(docs) <= 1:
+            return docs[:top_n]
+        if not self._slots.acquire(blocking=False):
+            logger.info("Reranker busy, using first-stage order")
+            return docs[:top_n]
+
+        future = self._pool.submit(self._score, query, [d.page_content for d in docs])
+        try:
+            scores = future.result(timeout=self.budget)
+        except TimeoutError:
+            logger.warning("Reranking exceeded %.0f ms budget, using first-stage order", self.budget * 1000)
+            return docs[:top_n]
+        except Exception as e:
+            logger.warning("Reranking failed, using first-stage order: %s", e)
+            return docs[:top_n]
+
+        # Stable: ties keep their first-stage order
+        order = np.argsort(-scores, kind="stable")[:top_n]
+        return [docs[i] for i in order]
+
+    def _score(self, query: str, passages: List[str]) -> np.ndarray:
+        try:
+            return self.scorer.score(query, passages)
+        finally:
+            self._slots.release()
+
+
+_reranker: Optional[Reranker] = None
+_reranker_lock = threading.Lock()
+
+
+def get_reranker() -> Optional[Reranker]:
+    """Process-wide reranker chosen by RERANKER (onnx | stub), or None when unset."""
+    global _reranker
+    name = os.getenv("RERANKER", "").strip().lower()
+    if not name:
+        return None
+    if name not in SCORERS:
+        logger.warning("Unknown RERANKER %r (expected one of %s), reranking disabled",
+                       name, ", ".join(SCORERS))
+        return None
+    if _reranker is None:
+        with _reranker_lock:
+            if _reranker is None:
+                _reranker = Reranker(SCORERS[name]())
+    return _reranker
@@ -0,0 +1,217 @@
+# Warm-up job: precompute answers to common onboarding questions per department/position.
+#
+# Run after `python -m rag.ingest`:
+#   python -m rag.warmup                       # data/questions.txt
+#   python -m rag.warmup --faq extra_faq.txt --workers 4
+#
+# Answers and their retrieved contexts are stored in `precomputed_answers`, keyed by policy index
+# version. Reruns only regenerate entries whose inputs (question, role, index, prompt, model)
+# changed. The live Assistant serves them through `PrecomputedAnswers`.
+
+from __future__ import annotations
+import argparse
+import hashlib
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+from rag.ingest import ROOT
+from rag.metadata import ALL
+
+logger = logging.getLogger(__name__)
+
+QUESTIONS_PATH = ROOT / "data" / "questions.txt"
+WARMUP_MODEL = os.getenv("WARMUP_MODEL", "llama-3.3-70b-versatile")
+WARMUP_WORKERS = int(os.getenv("WARMUP_WORKERS", "4"))
+CACHE_TTL = float(os.getenv("PRECOMPUTED_CACHE_TTL", "600"))
+
+
+def question_key(question: str) -> str:
+    normalized = " ".join(re.sub(r"[^\w\s]", " ", question.lower()).split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:32]
+
+
+def load_questions(*paths: Path) -> List[str]:
+    # One question per non-empty line; duplicates (after normalisation) are dropped
+    questions: Dict[str, str] = {}
+    for path in paths:
+        for line in Path(path).read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if line:
+                questions.setdefault(question_key(line), line)
+    return list(questions.values())
+
+
+def input_hash(question: str, department: str, position: str, index_version: str) -> str:
+    from prompt import CONTEXT_PROMPT, EMPLOYEE_PROMPT, SYSTEM_PROMPT
+
+    h = hashlib.sha256()
+    # The reranker changes which chunks end up in the context
+    for part in (question, department, position, index_version, WARMUP_MODEL, os.getenv("RERANKER", ""),
+                 SYSTEM_PROMPT, EMPLOYEE_PROMPT, CONTEXT_PROMPT):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+# ----------------------------------------------------------
+# Serving side
+# ----------------------------------------------------------
+
+_loaded: Dict[tuple, tuple] = {}
+_loaded_lock = threading.Lock()
+
+
+class PrecomputedAnswers:
+    """Answer cache for one department/position, shared across sessions and refreshed every CACHE_TTL."""
+
+    def __init__(self, index_version: Union[str, Callable[[], Optional[str]], None],
+                 department: Optional[str], position: Optional[str]):
+        # index_version may be a callable returning the live version (see rag.index.PolicyIndex)
+        self.index_version = index_version
+        self.department = department
+        self.position = position
+
+    @classmethod
+    def for_employee(cls, employee, index_version) -> Optional["PrecomputedAnswers"]:
+        if not index_version or not employee:
+            return None
+        return cls(index_version, employee.get("department"), employee.get("position"))
+
+    @property
+    def key(self) -> tuple:
+        version = self.index_version() if callable(self.index_version) else self.index_version
+        return (version, self.department, self.position)
+
+    def _answers(self, key: tuple) -> Dict[str, str]:
+        now = time.monotonic()
+        with _loaded_lock:
+            entry = _loaded.get(key)
+            if entry and now - entry[0] < CACHE_TTL:
+                return entry[1]
+
+        from database.db import get_precomputed_answers
+        try:
+            answers = get_precomputed_answers(*key)
+        except Exception as e:
+            logger.warning("Precomputed answers unavailable: %s", e)
+            answers = {}
+        with _loaded_lock:
+            _loaded[key] = (now, answers)
+        return answers
+
+    def get(self, question: str) -> Optional[str]:
+        key = self.key
+        if not all(key):
+            return None
+        return self._answers(key).get(question_key(question))
+
+
+# ----------------------------------------------------------
+# Batch job
+# ----------------------------------------------------------
+
+def _answer_one(vector_store, department: str, position: str, question: str) -> Dict[str, str]:
+    from assistant import Assistant
+    from langchain_groq import ChatGroq
+    from prompt import SYSTEM_PROMPT
+    from rag.rerank import RERANKER_FETCH_K, get_reranker
+
+    assistant = Assistant(
+        system_prompt=SYSTEM_PROMPT,
+        llm=ChatGroq(model=WARMUP_MODEL),
+        vector_store=vector_store,
+        reranker=get_reranker(),
+        fetch_k=RERANKER_FETCH_K,
+        # Role-level profile; location "all" keeps region-specific chunks out of shared answers
+        employee_information={"department": department, "position": position, "location": ALL},
+    )
+    contexts = assistant._retrieve(question)
+    answer = "".join(assistant.get_response(question, retrieved_policy_information=contexts))
+    return {"answer": answer, "contexts": contexts}
+
+
+def run(questions: List[str], workers: int = WARMUP_WORKERS, force: bool = False) -> int:
+    from rag.index import get_policy_index
+
+    # Leased for the whole run so every answer comes from the same generation
+    with get_policy_index().lease() as generation:
+        if generation is None:
+            raise SystemExit("❌ No policy index found. Run `python -m rag.ingest` first.")
+        return _run(questions, generation.store, generation.version, workers, force)
+
+
+def _run(questions: List[str], vector_store, index_version: str, workers: int, force: bool) -> int:
+    from database import db
+
+    db.ensure_precomputed_schema()
+    existing = {} if force else db.get_precomputed_input_hashes(index_version)
+
+    jobs = []
+    for combo in db.get_department_positions():
+        for question in questions:
+            key = (combo["department"], combo["position"], question_key(question))
+            digest = input_hash(question, combo["department"], combo["position"], index_version)
+            if existing.get(key) != digest:
+                jobs.append((combo["department"], combo["position"], question, digest))
+
+    print(f"⚙️ index {index_version}: {len(jobs)} answers to (re)generate with {workers} workers")
+    if not jobs:
+        return 0
+
+    failed = 0
+    # Bounded pool: at most `workers` LLM requests in flight
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_answer_one, vector_store, department, position, question): (department, position, question, digest)
+            for department, position, question, digest in jobs
+        }
+        for future in as_completed(futures):
+            department, position, question, digest = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failed += 1
+                logger.error("Warm-up failed for %s / %s / %r: %s", department, position, question, e)
+                continue
+            db.upsert_precomputed_answers([{
+                "index_version": index_version,
+                "department": department,
+                "position": position,
+                "question_key": question_key(question),
+                "question": question,
+                "answer": result["answer"],
+                "contexts": result["contexts"],
+                "input_hash": digest,
+            }])
+            print(f"✅ {department} / {position}: {question}")
+
+    print(f"🏁 {len(jobs) - failed} stored, {failed} failed")
+    return 1 if failed else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Precompute answers to common onboarding questions.")
+    parser.add_argument("--faq", type=Path, action="append", default=[],
+                        help="extra question file (one per line); repeatable")
+    parser.add_argument("--workers", type=int, default=WARMUP_WORKERS)
+    parser.add_argument("--force", action="store_true", help="regenerate everything")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    faq_env = os.getenv("WARMUP_FAQ_FILE")
+    paths = [QUESTIONS_PATH, *args.faq] + ([Path(faq_env)] if faq_env else [])
+    return run(load_questions(*paths), workers=args.workers, force=args.force)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,375 @@
+# Bounded per-session memory: transcript/audio caps, SQLite offloading and idle-session eviction.
+#
+# Each Streamlit session keeps its Assistant, transcript and last TTS clip in st.session_state.
+# This module keeps that bounded:
+#   - only the last SESSION_MAX_MESSAGES messages stay in memory, older ones go to a local SQLite
+#     cold store,
+#   - audio clips above SESSION_MAX_AUDIO_BYTES are not kept,
+#   - sessions idle for SESSION_IDLE_TTL seconds, or disconnected, have their heavy objects
+#     (Assistant, transcript, audio) dropped by a sweep that runs on other sessions' reruns, and
+#     are rehydrated from the cold store transparently when the user comes back.
+
+from __future__ import annotations
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).resolve().parent
+
+SESSION_MAX_MESSAGES = int(os.getenv("SESSION_MAX_MESSAGES", "40"))
+SESSION_MAX_AUDIO_BYTES = int(os.getenv("SESSION_MAX_AUDIO_BYTES", str(2 * 1024 * 1024)))
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "900"))
+SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "60"))
+COLD_STORE_PATH = Path(os.getenv("SESSION_COLD_STORE", str(ROOT / "data" / "session_store.sqlite3")))
+
+
+# ----------------------------------------------------------
+# 🗄️ Cold store (SQLite)
+# ----------------------------------------------------------
+
+class ColdStore:
+    """Archived transcript messages per session, in order."""
+
+    def __init__(self, path: Path = COLD_STORE_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS session_messages (
+                    session_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    message TEXT NOT NULL,
+                    PRIMARY KEY (session_id, seq)
+                )
+            """)
+            # Streamlit sessions live in this process's memory, so nothing archived by a previous
+            # server process can be rehydrated. (One cold store file per server process.)
+            self._db.execute("DELETE FROM session_messages")
+
+    def count(self, session_id: str) -> int:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT COUNT(*) FROM session_messages WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return row[0]
+
+    def append(self, session_id: str, messages: List[Dict[str, Any]]) -> None:
+        if not messages:
+            return
+        with self._lock, self._db:
+            start = self._db.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM session_messages WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()[0]
+            self._db.executemany(
+                "INSERT INTO session_messages (session_id, seq, message) VALUES (?, ?, ?)",
+                [(session_id, start + i, json.dumps(m)) for i, m in enumerate(messages)],
+            )
+
+    def load(self, session_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return the last `limit` archived messages (all when None), oldest first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT message FROM session_messages WHERE session_id = ? "
+                "ORDER BY seq DESC LIMIT ?",
+                (session_id, -1 if limit is None else limit),
+            ).fetchall()
+        return [json.loads(r[0]) for r in reversed(rows)]
+
+    def pop_tail(self, session_id: str, limit: int) -> List[Dict[str, Any]]:
+        """Remove and return the last `limit` archived messages, oldest first."""
+        messages = self.load(session_id, limit)
+        if messages:
+            with self._lock, self._db:
+                self._db.execute(
+                    "DELETE FROM session_messages WHERE session_id = ? AND seq IN ("
+                    "SELECT seq FROM session_messages WHERE session_id = ? ORDER BY seq DESC LIMIT ?)",
+                    (session_id, session_id, len(messages)),
+                )
+        return messages
+
+    def drop(self, session_id: str) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM session_messages WHERE session_id = ?", (session_id,))
+
+
+_cold_store: Optional[ColdStore] = None
+_cold_store_lock = threading.Lock()
+
+
+def get_cold_store() -> ColdStore:
+    global _cold_store
+    if _cold_store is None:
+        with _cold_store_lock:
+            if _cold_store is None:
+                _cold_store = ColdStore()
+    return _cold_store
+
+
+# ----------------------------------------------------------
+# 📏 Memory accounting
+# ----------------------------------------------------------
+
+def estimate_bytes(state) -> int:
+    """Bytes of transcript text and audio held by a session.
+
+    The Assistant (prompt chain, LLM client) is not included: it is roughly the same size for
+    every session and is freed by eviction, but has no cheap, meaningful size measure.
+    """
+    total = 0
+    for msg in [*(_get(state, "messages") or []), *(_get(state, "older_history") or [])]:
+        total += len(str(msg.get("content", "")).encode("utf-8"))
+    audio = _get(state, "audio_bytes")
+    if audio:
+        total += len(audio)
+    assistant = _get(state, "assistant")
+    if assistant is not None:
+        for item in getattr(assistant, "message_history", []):
+            total += len(str(getattr(item, "content", item)).encode("utf-8"))
+    return total
+
+
+def _get(state, key, default=None):
+    return state[key] if key in state else default
+
+
+# ----------------------------------------------------------
+# 🧹 Registry of live sessions + idle eviction
+# ----------------------------------------------------------
+
+class SessionRegistry:
+    """
+    Live sessions of this process, swept from other sessions' runs.
+
+    Entries hold the session's SessionState (see _current_state), so the sweep mutates another
+    session's state from the current script thread. That relies on Streamlit internals and is only
+    safe because both sides serialise on the entry's own lock: the session's run takes it in
+    enter_session before touching its state, and the sweep takes it and re-checks eligibility
+    before evicting. A session that reconnects mid-sweep therefore either sees the eviction
+    finished (and rehydrates) or is no longer idle (and is skipped).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self._last_sweep = time.monotonic()
+
+    def session_lock(self, session_id: str) -> threading.RLock:
+        with self._lock:
+            entry = self._sessions.setdefault(session_id, {
+                "state": None, "last_seen": time.monotonic(), "evicted": False, "lock": threading.RLock(),
+            })
+            return entry["lock"]
+
+    def touch(self, session_id: str, state) -> None:
+        # Call with session_lock(session_id) held
+        self.session_lock(session_id)
+        with self._lock:
+            entry = self._sessions[session_id]
+            entry.update(state=state, last_seen=time.monotonic(), evicted=False)
+
+    def forget(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def sweep(self, now: Optional[float] = None, force: bool = False) -> List[str]:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if not force and now - self._last_sweep < SWEEP_INTERVAL:
+                return []
+            self._last_sweep = now
+            candidates = list(self._sessions.items())
+
+        swept = []
+        for session_id, entry in candidates:
+            # Sessions whose run is holding the lock are busy, not idle
+            if not entry["lock"].acquire(blocking=False):
+                continue
+            try:
+                state = entry["state"]
+                if state is None:
+                    continue
+                if not _is_active_session(session_id):
+                    # Closed or reloaded tab: the session id never comes back, so nothing is
+                    # archived (the transcript is already in Postgres) and the entry is dropped
+                    discard(session_id, state)
+                    self.forget(session_id)
+                    logger.info("Discarded disconnected session %s", session_id)
+                elif not entry["evicted"] and now - entry["last_seen"] > SESSION_IDLE_TTL:
+                    freed = evict(session_id, state)
+                    # Kept (with a now-small state) so its archive is dropped once it disconnects
+                    entry["evicted"] = True
+                    logger.info("Evicted idle session %s (~%d KB transcript/audio)", session_id, freed // 1024)
+                else:
+                    continue
+                swept.append(session_id)
+            except Exception:
+                logger.exception("Failed to sweep session %s", session_id)
+            finally:
+                entry["lock"].release()
+        return swept
+
+    def report(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            entries = list(self._sessions.items())
+        rows = []
+        for session_id, entry in entries:
+            if entry["state"] is None:
+                continue
+            rows.append({
+                "session_id": session_id,
+                "idle_seconds": round(now - entry["last_seen"], 1),
+                "bytes": estimate_bytes(entry["state"]),
+            })
+        return rows
+
+
+def _is_active_session(session_id: str) -> bool:
+    from streamlit import runtime
+    if not runtime.exists():
+        return True
+    return runtime.get_instance().is_active_session(session_id)
+
+
+_registry = SessionRegistry()
+
+
+def evict(session_id: str, state) -> int:
+    """Move the transcript to the cold store and drop the session's heavy objects.
+
+    Everything else in the session (user, employee, flags) is small and stays in memory.
+    """
+    get_cold_store().append(session_id, list(_get(state, "messages") or []))
+    freed = _drop_heavy(state)
+    state["session_evicted"] = True
+    return freed
+
+
+def discard(session_id: str, state) -> int:
+    """Drop a disconnected session's heavy objects and its archive without saving anything."""
+    freed = _drop_heavy(state)
+    get_cold_store().drop(session_id)
+    # Should the session reconnect after all, its history is reloaded from Postgres
+    state["history_loaded"] = False
+    state["history_cursor"] = None
+    state["archived_count"] = 0
+    return freed
+
+
+def _drop_heavy(state) -> int:
+    cancel_generation(state)
+    freed = estimate_bytes(state)
+    state["messages"] = []
+    # Earlier conversations paged in from Postgres; the user can load them again
+    state["older_history"] = []
+    state["older_history_hidden"] = 0
+    if "history_resume_cursor" in state:
+        state["history_cursor"] = state["history_resume_cursor"]
+    state["assistant"] = None
+    state["audio_bytes"] = None
+    return freed
+
+
+# ----------------------------------------------------------
+# 🔌 Hooks used by app.py / gui.py for the current session
+# ----------------------------------------------------------
+
+def current_session_id() -> Optional[str]:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else None
+
+
+def _current_state():
+    # ctx.session_state is a per-run SafeSessionState wrapper that Streamlit discards when the
+    # run ends. The SessionState it wraps (private attribute `_state`, Streamlit internals) is
+    # owned by the AppSession and lives as long as the session, so that is what the registry
+    # holds for other sessions' sweeps. See SessionRegistry for how access is serialised.
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return None
+    return getattr(ctx.session_state, "_state", ctx.session_state)
+
+
+def enter_session() -> None:
+    """Call at the top of every run: rehydrate if evicted, mark active, sweep idle sessions."""
+    session_id = current_session_id()
+    if session_id is None:
+        return
+
+    # Waits for a sweep that is evicting this session right now, then sees its result
+    with _registry.session_lock(session_id):
+        if st.session_state.get("session_evicted"):
+            rehydrate(session_id)
+        _registry.touch(session_id, _current_state())
+    _registry.sweep()
+
+
+def rehydrate(session_id: str) -> None:
+    cold = get_cold_store()
+    st.session_state["messages"] = cold.pop_tail(session_id, SESSION_MAX_MESSAGES)
+    st.session_state["archived_count"] = cold.count(session_id)
+    st.session_state["session_evicted"] = False
+    # The Assistant is rebuilt by app.py because st.session_state["assistant"] is None
+    logger.info("Rehydrated session %s", session_id)
+
+
+def enforce_caps() -> None:
+    """Trim the in-memory transcript and drop oversized audio for the current session."""
+    messages = st.session_state.get("messages") or []
+    overflow = len(messages) - SESSION_MAX_MESSAGES
+    if overflow > 0:
+        session_id = current_session_id()
+        if session_id is not None:
+            get_cold_store().append(session_id, messages[:overflow])
+            st.session_state["archived_count"] = st.session_state.get("archived_count", 0) + overflow
+        del messages[:overflow]
+
+    audio = st.session_state.get("audio_bytes")
+    if audio and len(audio) > SESSION_MAX_AUDIO_BYTES:
+        st.session_state["audio_bytes"] = None
+
+
+def cancel_generation(state=None) -> None:
+    """Abort the session's in-flight answer (LLM request and pending TTS), if there is one."""
+    state = st.session_state if state is None else state
+    generation = _get(state, "active_generation")
+    if generation is not None:
+        state["active_generation"] = None
+        generation.cancel()
+
+
+def archived_messages() -> List[Dict[str, Any]]:
+    session_id = current_session_id()
+    return get_cold_store().load(session_id) if session_id else []
+
+
+def session_bytes() -> int:
+    return estimate_bytes(st.session_state)
+
+
+def release_session() -> None:
+    """Forget the current session and its archived transcript (logout)."""
+    cancel_generation()
+    session_id = current_session_id()
+    if session_id is None:
+        return
+    _registry.forget(session_id)
+    get_cold_store().drop(session_id)
+
+
+def memory_report() -> List[Dict[str, Any]]:
+    return _registry.report()
@@ -0,0 +1,45 @@
+# Token coalescing between the LLM stream and the UI.
+#
+# st.write_stream sends one websocket delta (and re-renders the markdown) per chunk it receives.
+# LLM streams arrive token by token, so frames are batched here: a frame is emitted when
+# STREAM_FRAME_MS has passed since the last one, when it reaches STREAM_FRAME_MAX_CHARS, or at the
+# end of a sentence. The first token is always sent straight away so time-to-first-token is unchanged.
+
+import os
+import time
+from typing import Callable, Iterable, Iterator
+
+STREAM_FRAME_MS = float(os.getenv("STREAM_FRAME_MS", "40"))
+STREAM_FRAME_MAX_CHARS = int(os.getenv("STREAM_FRAME_MAX_CHARS", "200"))
+SENTENCE_ENDINGS = (".", "!", "?", ":", "\n")
+
+
+def coalesce_stream(
+    tokens: Iterable[str],
+    max_interval: float = STREAM_FRAME_MS / 1000,
+    max_chars: int = STREAM_FRAME_MAX_CHARS,
+    clock: Callable[[], float] = time.monotonic,
+) -> Iterator[str]:
+    """Yield the concatenated `tokens` in fewer, larger frames. The joined output is identical."""
+    buffer = []
+    size = 0
+    last_emit = None
+
+    for token in tokens:
+        if not token:
+            continue
+        buffer.append(token)
+        size += len(token)
+
+        now = clock()
+        if (
+            last_emit is None
+            or now - last_emit >= max_interval
+            or size >= max_chars
+            or token.rstrip(" ").endswith(SENTENCE_ENDINGS)
+        ):
+            yield "".join(buffer)
+            buffer, size, last_emit = [], 0, now
+
+    if buffer:
+        yield "".join(buffer)
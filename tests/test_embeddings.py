@@ -0,0 +1,75 @@
+# Query embeddings are cached on normalised text and concurrent lookups share one backend call.
+
+import threading
+
+import numpy as np
+
+from rag.embeddings import EmbeddingService, HashingBackend, normalize_vectors
+
+
+class CountingBackend(HashingBackend):
+    def __init__(self):
+        super().__init__(dim=32)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def encode(self, texts):
+        with self._lock:
+            self.calls.append(list(texts))
+        return super().encode(texts)
+
+
+def test_concurrent_queries_share_one_backend_call():
+    backend = CountingBackend()
+    # The batch closes as soon as it is full, well inside the wait window
+    service = EmbeddingService(backend, max_batch_size=8, max_wait_ms=2000)
+    questions = [f"question number {i}" for i in range(8)]
+    results = {}
+    start = threading.Barrier(len(questions))
+
+    def ask(question):
+        start.wait()
+        results[question] = service.embed_query(question)
+
+    threads = [threading.Thread(target=ask, args=(q,)) for q in questions]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert len(backend.calls) == 1
+    assert sorted(backend.calls[0]) == sorted(questions)
+    expected = normalize_vectors(HashingBackend(dim=32).encode(questions)).tolist()
+    assert [results[q] for q in questions] == expected
+
+
+def test_normalised_text_hits_the_cache():
+    backend = CountingBackend()
+    service = EmbeddingService(backend, max_wait_ms=0)
+
+    first = service.embed_query("What is the  Dress Code?")
+    second = service.embed_query("  what is the dress code?")
+
+    assert second == first
+    assert backend.calls == [["What is the  Dress Code?"]]
+
+
+def test_cache_evicts_least_recently_used():
+    backend = CountingBackend()
+    service = EmbeddingService(backend, max_wait_ms=0, cache_size=2)
+
+    service.embed_query("alpha")
+    service.embed_query("beta")
+    service.embed_query("alpha")  # hit, so "beta" is now the oldest
+    service.embed_query("gamma")  # evicts "beta"
+    service.embed_query("alpha")
+    service.embed_query("beta")
+
+    assert backend.calls == [["alpha"], ["beta"], ["gamma"], ["beta"]]
+
+
+def test_normalize_vectors_keeps_zero_rows():
+    vectors = normalize_vectors(np.array([[3.0, 4.0], [0.0, 0.0]]))
+
+    assert np.allclose(vectors, [[0.6, 0.8], [0.0, 0.0]])
+    assert np.isfinite(vectors).all()
@@ -0,0 +1,70 @@
+# The system prompt must be a byte-identical prefix for every user so the provider can cache it.
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from assistant import Assistant
+from prompt import SYSTEM_PROMPT, format_employee_information
+
+ALICE = {
+    "employee_id": "0b6f6c5e-7c1a-4d8e-9d55-2a9a3f0c1e01",
+    "name": "Alice",
+    "lastname": "Wesker",
+    "position": "Research Scientist",
+    "department": "R&D",
+    "location": "Raccoon City HQ",
+    "supervisor": "William Birkin",
+    "hire_date": "2024-01-15",
+    "skills": ["Genetic Research", "Python"],
+    "salary": 123456,
+    "phone_number": "+1-555-0100",
+}
+
+BOB = {
+    "employee_id": "6d2c8b1a-41f3-4a7e-8c2b-9e1d5f7a3b02",
+    "name": "Bob",
+    "lastname": "Redfield",
+    "position": "Security Officer",
+    "department": "Security",
+    "location": "Umbrella Europe",
+    "supervisor": "Albert Wesker",
+    "hire_date": "2023-06-01",
+    "skills": ["Cybersecurity"],
+    "salary": 98765,
+    "phone_number": "+44-20-5550-0199",
+}
+
+
+def render_messages(employee, question):
+    assistant = Assistant(
+        system_prompt=SYSTEM_PROMPT,
+        llm=FakeListChatModel(responses=["ok"]),
+        employee_information=employee,
+    )
+    inputs = {"user_input": question, "retrieved_policy_information": "[1.1 Company Overview]\n..."}
+    return assistant.prompt_chain.invoke(inputs).to_messages()
+
+
+def test_system_prefix_is_byte_identical_across_users():
+    alice = render_messages(ALICE, "What is the dress code?")
+    bob = render_messages(BOB, "How do I report a security breach?")
+
+    assert alice[0].type == bob[0].type == "system"
+    assert alice[0].content.encode("utf-8") == bob[0].content.encode("utf-8")
+    assert alice[0].content.encode("utf-8") == SYSTEM_PROMPT.encode("utf-8")
+    # Per-user data only appears after the static prefix
+    assert "Alice" not in alice[0].content
+    assert "Alice" in alice[1].content and "Bob" in bob[1].content
+
+
+def test_employee_information_excludes_sensitive_fields():
+    text = format_employee_information(ALICE)
+
+    assert "- Name: Alice Wesker" in text
+    assert "- Skills: Genetic Research, Python" in text
+    for value in (ALICE["salary"], ALICE["phone_number"], ALICE["employee_id"]):
+        assert str(value) not in text
+    assert "salary" not in text.lower() and "phone" not in text.lower()
+
+
+def test_employee_information_without_employee():
+    assert format_employee_information(None) == "Unknown employee."
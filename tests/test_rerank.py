@@ -0,0 +1,65 @@
+# The reranker keeps the best chunks in a stable order and falls back to the first-stage order
+# whenever scoring is slow, fails or has no free slot.
+
+import threading
+
+from langchain_core.documents import Document
+
+from rag.rerank import Reranker, StubReranker
+
+DOCS = [
+    Document(page_content="Office hours and parking"),
+    Document(page_content="Dress code for the office"),
+    Document(page_content="Annual leave policy"),
+    Document(page_content="Dress code exceptions on Fridays"),
+]
+
+
+class SlowScorer:
+    def __init__(self):
+        self.release = threading.Event()
+
+    def score(self, query, passages):
+        self.release.wait(timeout=5)
+        return StubReranker().score(query, passages)
+
+
+class FailingScorer:
+    def score(self, query, passages):
+        raise RuntimeError("model not found")
+
+
+def test_best_matches_first_and_ties_keep_first_stage_order():
+    reranker = Reranker(StubReranker(), budget_ms=5000)
+
+    ranked = reranker.rerank("dress code", DOCS, top_n=3)
+
+    # Both dress code chunks score 1.0; the two others tie at 0 and the first of them is kept
+    assert ranked == [DOCS[1], DOCS[3], DOCS[0]]
+
+
+def test_falls_back_when_scoring_exceeds_budget():
+    scorer = SlowScorer()
+    reranker = Reranker(scorer, budget_ms=20)
+    try:
+        assert reranker.rerank("dress code", DOCS, top_n=2) == DOCS[:2]
+    finally:
+        scorer.release.set()
+
+
+def test_falls_back_when_scorer_raises():
+    reranker = Reranker(FailingScorer(), budget_ms=5000)
+
+    assert reranker.rerank("dress code", DOCS, top_n=2) == DOCS[:2]
+
+
+def test_falls_back_when_all_slots_are_busy():
+    scorer = SlowScorer()
+    reranker = Reranker(scorer, budget_ms=20, max_in_flight=1)
+    try:
+        # The first call times out but its scoring keeps holding the only slot
+        assert reranker.rerank("dress code", DOCS, top_n=2) == DOCS[:2]
+        scorer.score = StubReranker().score
+        assert reranker.rerank("dress code", DOCS, top_n=2) == DOCS[:2]
+    finally:
+        scorer.release.set()
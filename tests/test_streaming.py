@@ -0,0 +1,54 @@
+# Coalescing and sentence splitting regroup streamed tokens without changing the text.
+
+from streaming import coalesce_stream
+from voice.pipeline import SentenceSplitter
+
+TOKENS = ["Employees", " may", " work", " remotely", " two", " days", " a", " week.", " Ask",
+          " your", " supervisor", "", " first!", "\n", "Core", " hours", " are", " 10", " to", " 4"]
+
+
+class FakeClock:
+    def __init__(self, step):
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+def test_coalesced_frames_join_to_the_input():
+    frames = list(coalesce_stream(iter(TOKENS), max_interval=1.0, max_chars=25, clock=FakeClock(0.01)))
+
+    assert "".join(frames) == "".join(TOKENS)
+    assert len(frames) < len([t for t in TOKENS if t])
+    assert all(frames)
+
+
+def test_first_token_is_sent_immediately():
+    frames = coalesce_stream(iter(TOKENS), max_interval=1.0, max_chars=1000, clock=FakeClock(0.0))
+
+    assert next(frames) == "Employees"
+
+
+def test_frames_close_at_sentence_ends():
+    frames = list(coalesce_stream(iter(TOKENS), max_interval=1.0, max_chars=1000, clock=FakeClock(0.0)))
+
+    assert frames[1] == " may work remotely two days a week."
+
+
+def test_sentence_splitter_reproduces_the_text():
+    text = ("Employees may work remotely two days a week. Ask your supervisor first! "
+            "Short one. Core hours are 10 to 4 in every office")
+    splitter = SentenceSplitter(min_chars=20)
+    sentences = []
+    for token in text.split(" "):
+        sentences.extend(splitter.feed(token + " "))
+    rest = splitter.flush()
+
+    assert sentences == [
+        "Employees may work remotely two days a week.",
+        "Ask your supervisor first!",
+    ]
+    assert rest == "Short one. Core hours are 10 to 4 in every office"
+    assert " ".join(sentences + [rest]) == text
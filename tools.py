@@ -0,0 +1,34 @@
+# Tools the assistant can call during a conversation.
+
+import json
+from typing import Optional
+
+from langchain_core.tools import tool
+
+
+@tool
+def employee_directory(
+    department: Optional[str] = None,
+    location: Optional[str] = None,
+    skill: Optional[str] = None,
+) -> str:
+    """Look up colleagues in the Umbrella Corporation employee directory.
+
+    Use this for questions about other employees, e.g. "who in Security knows Cybersecurity?"
+    or "who else is at Raccoon City HQ?". At least one filter is required; filters are combined.
+
+    Args:
+        department: Department name, one of R&D, IT, Operations, HR, Security.
+        location: Site name, e.g. Raccoon City HQ, Umbrella Europe, Umbrella Asia,
+            Umbrella North America, Umbrella South America.
+        skill: Exact skill name, e.g. Cybersecurity, Python, Genetic Research, Leadership.
+    """
+    from database.directory import search_employees
+
+    return json.dumps(
+        search_employees(department=department, location=location, skill=skill),
+        default=str,
+    )
+
+
+ASSISTANT_TOOLS = [employee_directory]
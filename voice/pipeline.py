@@ -0,0 +1,168 @@
+# Pipelined voice turn: retrieval starts as soon as the transcript is ready, tokens stream to the
+# UI, and completed sentences are synthesised by a background TTS stage while generation continues.
+#
+#   transcript ──▶ retrieval (thread) ──▶ LLM token stream ──▶ UI
+#                                                 └──▶ sentence splitter ──▶ TTS worker ──▶ audio clips
+#
+# Nothing here calls Streamlit, so the stages can run off the script thread.
+
+from __future__ import annotations
+import logging
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Shared by all sessions: retrieval only, the LLM stream stays on the script thread
+_retrieval_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="voice-retrieval")
+
+SENTENCE_END_RE = re.compile(r"(?<=[.!?:])\s+|\n+")
+MIN_SENTENCE_CHARS = 40
+
+
+class SentenceSplitter:
+    """Accumulates streamed tokens and emits complete sentences (short ones are merged)."""
+
+    def __init__(self, min_chars: int = MIN_SENTENCE_CHARS):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, token: str) -> List[str]:
+        self._buffer += token
+        parts = SENTENCE_END_RE.split(self._buffer)
+        # The last part is still being written
+        self._buffer = parts.pop()
+        sentences, current = [], ""
+        for part in parts:
+            current = f"{current} {part}".strip() if current else part.strip()
+            if len(current) >= self.min_chars:
+                sentences.append(current)
+                current = ""
+        if current:
+            self._buffer = f"{current} {self._buffer}"
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        rest, self._buffer = self._buffer.strip(), ""
+        return rest or None
+
+
+class SentenceTTS:
+    """Background TTS stage: synthesises sentences in order as they arrive."""
+
+    def __init__(self, synthesize: Callable[[str], bytes]):
+        self._synthesize = synthesize
+        self._inbox: "queue.Queue[Optional[str]]" = queue.Queue()
+        self.clips: List[bytes] = []
+        # Sentences whose synthesis raised; callers decide whether to fall back
+        self.failed: List[str] = []
+        self.first_clip_at: Optional[float] = None
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="voice-tts", daemon=True)
+        self._thread.start()
+
+    def submit(self, sentence: str) -> None:
+        self._inbox.put(sentence)
+
+    def close(self) -> None:
+        self._inbox.put(None)
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        self._inbox.put(None)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        self._thread.join(timeout)
+
+    def is_alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def _run(self) -> None:
+        while not self._cancelled.is_set():
+            sentence = self._inbox.get()
+            if sentence is None:
+                break
+            try:
+                clip = self._synthesize(sentence)
+            except Exception as e:
+                logger.warning("Sentence TTS failed: %s", e)
+                self.failed.append(sentence)
+                continue
+            if clip and not self._cancelled.is_set():
+                if self.first_clip_at is None:
+                    self.first_clip_at = time.perf_counter()
+                self.clips.append(clip)
+
+
+class VoiceTurn:
+    """
+    One voice question, end to end.
+
+    `started_at` is when the recording arrived (before transcription), so the reported
+    latencies are what the user experiences.
+    """
+
+    def __init__(self, assistant, transcript: str, synthesize: Callable[[str], bytes], started_at: float,
+                 first_turn: bool = False):
+        self.assistant = assistant
+        self.transcript = transcript
+        self.first_turn = first_turn
+        self.started_at = started_at
+        self.transcribed_at = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.done_at: Optional[float] = None
+
+        # Retrieval starts immediately, in parallel with the UI rendering the user's message
+        self._context = _retrieval_pool.submit(assistant._retrieve, transcript)
+        self._splitter = SentenceSplitter()
+        self.tts = SentenceTTS(synthesize)
+        self.generation = None
+
+    def tokens(self) -> Iterator[str]:
+        try:
+            context = self._context.result()
+        except Exception as e:
+            logger.warning("Prefetched retrieval failed, retrieving inline: %s", e)
+            context = None
+
+        self.generation = self.assistant.get_response(
+            self.transcript, retrieved_policy_information=context, first_turn=self.first_turn
+        )
+        for token in self.generation:
+            if self.first_token_at is None:
+                self.first_token_at = time.perf_counter()
+            for sentence in self._splitter.feed(token):
+                self.tts.submit(sentence)
+            yield token
+
+        rest = self._splitter.flush()
+        if rest:
+            self.tts.submit(rest)
+        self.tts.close()
+        self.done_at = time.perf_counter()
+
+    def cancel(self) -> None:
+        # Stops the LLM request and drops any sentences not yet synthesised
+        self._context.cancel()
+        if self.generation is not None:
+            self.generation.cancel()
+        self.tts.cancel()
+
+    def metrics(self) -> dict:
+        def since_start(t):
+            return None if t is None else round(t - self.started_at, 3)
+
+        return {
+            "transcription_s": since_start(self.transcribed_at),
+            "first_token_s": since_start(self.first_token_at),
+            "first_audio_s": since_start(self.tts.first_clip_at),
+            "generation_done_s": since_start(self.done_at),
+        }
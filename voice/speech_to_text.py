@@ -2,11 +2,18 @@
 
 import os
 import tempfile
-from groq import Groq
 import streamlit as st
 
-# Initialize Groq client
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+# Groq client is created on first transcription, not at import time
+_client = None
+
+
+def get_client():
+    global _client
+    if _client is None:
+        from groq import Groq
+        _client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    return _client
 
 
 def transcribe_audio(audio_bytes: bytes) -> str:
@@ -22,10 +29,12 @@ def transcribe_audio(audio_bytes: bytes) -> str:
     if not audio_bytes:
         return ""
 
-    if not client.api_key:
+    if not os.getenv("GROQ_API_KEY"):
         st.error("❌ GROQ_API_KEY not found in environment variables")
         return ""
 
+    client = get_client()
+
     # Create temporary file for audio
     tmp_path = None
     try:
@@ -1,24 +1,15 @@
 # Convert assistant reply to audio
 
 from io import BytesIO
+from importlib.util import find_spec
 import tempfile
 import contextlib
 import streamlit as st
 import os
 
-# Optional deps
-try:
-    from gtts import gTTS
-    GTTS_AVAILABLE = True
-except ImportError:
-    GTTS_AVAILABLE = False
-    gTTS = None
-
-try:
-    import pyttsx3
-    PYTTSX3_AVAILABLE = True
-except ImportError:
-    PYTTSX3_AVAILABLE = False
+# Optional deps: only check they are installed here, import them on first synthesis
+GTTS_AVAILABLE = find_spec("gtts") is not None
+PYTTSX3_AVAILABLE = find_spec("pyttsx3") is not None
 
 
 def _pyttsx3_bytes(text: str) -> bytes:
@@ -44,6 +35,14 @@ def _pyttsx3_bytes(text: str) -> bytes:
             os.remove(path)
 
 
+def gtts_bytes(text: str) -> bytes:
+    """Online TTS using gTTS (MP3). No Streamlit calls, so it is safe from worker threads."""
+    from gtts import gTTS
+    buf = BytesIO()
+    gTTS(text=text, lang="en", slow=False).write_to_fp(buf)
+    return buf.getvalue()
+
+
 @st.cache_data(show_spinner=False, ttl=3600)
 def tts_generate(text: str, *, offline: bool = False) -> bytes:
     """
@@ -75,13 +74,9 @@ def tts_generate(text: str, *, offline: bool = False) -> bytes:
                 return _pyttsx3_bytes(text)
 
         # Online TTS with gTTS
-        if GTTS_AVAILABLE and gTTS is not None:
+        if GTTS_AVAILABLE:
             try:
-                buf = BytesIO()
-                tts = gTTS(text=text, lang="en", slow=False)
-                tts.write_to_fp(buf)
-                buf.seek(0)
-                return buf.getvalue()
+                return gtts_bytes(text)
             except Exception as e:
                 st.warning(f"⚠️ Online TTS failed: {e}. Trying offline TTS...")
                 if PYTTSX3_AVAILABLE: